@@ -0,0 +1,238 @@
+"""
+Engine benchmark: a fixed corpus of 3x3 and 4x4 positions searched with
+Searcher.minimax at each depth setting.
+
+Every case (position, depth) runs on a fresh Searcher, so the numbers are
+a cold time-to-move: wall time (best of `--repeat` runs), nodes, nodes per
+second, the peak memory the search allocates (traced in one extra run, the
+transposition table itself is reported separately) and how many table
+entries it filled. The value and move are recorded too, so a run also
+shows when a change alters what the engine plays.
+
+The results are one JSON document (`--out`, default stdout); a readable
+table goes to stderr. `--compare` reads an earlier document and prints
+the time and node ratios per case, e.g. between two commits:
+
+    python dab_bench.py --out before.json
+    git checkout my-branch
+    python dab_bench.py --compare before.json --max-slowdown 1.1
+"""
+import argparse
+import gc
+import json
+import math
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+
+import dab_engine as engine
+from dab_engine import AI, HUMAN
+
+# name -> (board size, phase, drawn edges, human boxes, AI boxes, side to move)
+CORPUS = {
+    "3x3-empty": (3, "opening", [], [], [], HUMAN),
+    "3x3-open2": (3, "opening", [2, 10], [], [], HUMAN),
+    "3x3-mid4": (3, "middlegame", [0, 2, 3, 5], [], [], HUMAN),
+    "3x3-chains7": (3, "endgame", [0, 1, 4, 5, 8, 9, 11], [], [], AI),
+    "4x4-empty": (4, "opening", [], [], [], HUMAN),
+    "4x4-open2": (4, "opening", [4, 19], [], [], HUMAN),
+    "4x4-mid6": (4, "middlegame", [2, 4, 6, 10, 14, 22], [], [], HUMAN),
+    "4x4-mid9": (4, "middlegame", [1, 3, 4, 8, 9, 16, 19, 20, 23], [], [], AI),
+    "4x4-chains14": (4, "endgame", [0, 2, 3, 4, 5, 9, 10, 11, 12, 13, 16, 18, 20, 23],
+                     [], [0], AI),
+    "4x4-chains15": (4, "endgame", [0, 2, 3, 4, 5, 8, 9, 10, 11, 14, 15, 16, 20, 22, 23],
+                     [8], [2], AI),
+    "4x4-chains16": (4, "endgame", [0, 2, 3, 6, 8, 9, 10, 12, 13, 14, 16, 17, 19, 20, 21, 23],
+                     [3, 6], [0], AI),
+}
+
+# Kedalaman yang diukur; "full" (tanpa batas) hanya untuk posisi dengan
+# paling banyak FULL_MAX_EMPTY sisi kosong
+DEPTHS = (2, 4, 6, 8)
+FULL_MAX_EMPTY = 18
+
+
+def position_lists(name):
+    """(geom, edge_state, box_owner, player) of a corpus position, as the GUI keeps them."""
+    size, _, edges, human, ai, player = CORPUS[name]
+    geom = engine.geometry(size)
+    edge_state = [1 if e in edges else 0 for e in range(geom.total_edges)]
+    box_owner = [HUMAN if b in human else AI if b in ai else 0 for b in range(len(geom.boxes))]
+    return geom, edge_state, box_owner, player
+
+
+def cases(names, depths):
+    """Every (position, depth) pair to run; depth None is a search to the end."""
+    out = []
+    for name in names:
+        geom, edge_state, _, _ = position_lists(name)
+        empty = edge_state.count(0)
+        for depth in depths:
+            if depth is None and empty > FULL_MAX_EMPTY:
+                continue
+            if depth is not None and depth >= empty:
+                # deeper than the game lasts: same search as "full"
+                continue
+            out.append((name, depth))
+    return out
+
+
+def run_case(name, depth, repeat, tt_entries, memory=True):
+    """Runs one case, returns its result record (peak_kb is None without `memory`)."""
+    geom, edge_state, box_owner, player = position_lists(name)
+    best = None
+    for _ in range(repeat):
+        searcher = engine.Searcher(geom, tt=engine.TranspositionTable(geom, tt_entries))
+        gc.collect()
+        start = time.perf_counter()
+        value, move = searcher.minimax(edge_state, box_owner, player, depth)
+        seconds = time.perf_counter() - start
+        if best is None or seconds < best:
+            best = seconds
+    stats = searcher.stats
+    tt_used = len(searcher.tt)
+
+    peak = None
+    if memory:
+        # one more run under tracemalloc, which slows the search down too much to time it
+        searcher = engine.Searcher(geom, tt=engine.TranspositionTable(geom, tt_entries))
+        gc.collect()
+        tracemalloc.start()
+        searcher.minimax(edge_state, box_owner, player, depth)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    phase = CORPUS[name][1]
+    return {
+        "position": name,
+        "size": geom.name,
+        "phase": phase,
+        "depth": "full" if depth is None else depth,
+        "value": value,
+        "move": move,
+        "seconds": round(best, 6),
+        "nodes": stats.nodes,
+        "nodes_per_sec": round(stats.nodes / best) if best else 0,
+        "tt_hit_rate": stats.as_dict()["tt_hit_rate"],
+        "cutoffs": stats.cutoffs,
+        "peak_kb": None if peak is None else round(peak / 1024, 1),
+        "tt_entries": tt_used,
+        "tt_kb": searcher.tt.max_entries * 16 // 1024,
+    }
+
+
+def _commit():
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                             text=True, cwd=os.path.dirname(os.path.abspath(__file__)), timeout=10)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return out.stdout.strip() or None
+
+
+def compare(base, results, out=sys.stderr):
+    """
+    Prints time and node ratios (this run / base) for the cases both runs
+    have. Returns the geometric mean of the time ratios, or None.
+    """
+    earlier = {(r["position"], r["depth"]): r for r in base["results"]}
+    ratios = []
+    print(f"compared with {base['meta'].get('commit') or 'base run'}:", file=out)
+    for rec in results:
+        old = earlier.get((rec["position"], rec["depth"]))
+        if old is None:
+            continue
+        time_ratio = rec["seconds"] / old["seconds"] if old["seconds"] else 1.0
+        ratios.append(time_ratio)
+        note = ""
+        if (rec["value"], rec["move"]) != (old["value"], old["move"]):
+            note = f"  value/move {old['value']}/{old['move']} -> {rec['value']}/{rec['move']}"
+        print(f"    {rec['position']:<14} depth {rec['depth']!s:<5} time x{time_ratio:5.2f}  "
+              f"nodes {old['nodes']} -> {rec['nodes']}{note}", file=out)
+    if not ratios:
+        print("    no cases in common", file=out)
+        return None
+    mean = math.exp(sum(math.log(max(r, 1e-9)) for r in ratios) / len(ratios))
+    print(f"    geometric mean time ratio x{mean:.3f} over {len(ratios)} cases", file=out)
+    return mean
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Time Searcher.minimax on a fixed corpus of positions and depths.")
+    parser.add_argument("positions", nargs="*", metavar="POSITION",
+                        help=f"corpus positions, or prefixes such as 4x4 (default: all of "
+                             f"{', '.join(CORPUS)})")
+    parser.add_argument("--depths", nargs="+", default=[str(d) for d in DEPTHS] + ["full"],
+                        help="depth settings; 'full' searches to the end")
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per case (best is kept)")
+    parser.add_argument("--tt-entries", type=int, default=engine.TT_MAX_ENTRIES,
+                        help="transposition table size of every search")
+    parser.add_argument("--no-memory", action="store_true",
+                        help="skip the traced run that measures peak memory (several times faster)")
+    parser.add_argument("--out", default="-", help="file for the JSON results (- = stdout)")
+    parser.add_argument("--compare", metavar="BASE", help="earlier JSON results to compare with")
+    parser.add_argument("--max-slowdown", type=float,
+                        help="with --compare: exit with status 1 if the mean time ratio is above this")
+    args = parser.parse_args(argv)
+
+    names = [n for n in CORPUS if not args.positions or any(n.startswith(p) for p in args.positions)]
+    if not names:
+        parser.error(f"no corpus position matches {' '.join(args.positions)}")
+    try:
+        depths = [None if d == "full" else int(d) for d in args.depths]
+    except ValueError:
+        parser.error("depths must be integers or 'full'")
+    if args.repeat < 1:
+        parser.error("--repeat must be at least 1")
+    base = None
+    if args.compare:
+        try:
+            with open(args.compare, encoding="utf-8") as f:
+                base = json.load(f)
+        except (OSError, ValueError) as err:
+            parser.error(f"cannot read {args.compare}: {err}")
+
+    results = []
+    start = time.perf_counter()
+    for name, depth in cases(names, depths):
+        rec = run_case(name, depth, args.repeat, args.tt_entries, not args.no_memory)
+        results.append(rec)
+        peak = "-" if rec["peak_kb"] is None else rec["peak_kb"]
+        print(f"{rec['position']:<14} depth {rec['depth']!s:<5} {rec['seconds']:9.4f}s "
+              f"{rec['nodes']:>8} nodes {rec['nodes_per_sec']:>7} n/s  peak {peak!s:>8} KB  "
+              f"tt {rec['tt_entries']:>7}  value {rec['value']:+d}  move {rec['move']}",
+              file=sys.stderr)
+
+    document = {
+        "meta": {
+            "commit": _commit(),
+            "time": round(time.time()),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "repeat": args.repeat,
+            "tt_entries": args.tt_entries,
+            "seconds": round(time.perf_counter() - start, 2),
+        },
+        "results": results,
+    }
+    text = json.dumps(document, indent=1)
+    if args.out == "-":
+        print(text)
+    else:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+
+    if base is not None:
+        mean = compare(base, results)
+        if args.max_slowdown is not None and mean is not None and mean > args.max_slowdown:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,130 @@
+"""
+Chain-and-loop endgame solver for Dots and Boxes.
+
+Once every unfinished box has exactly two sides drawn, no safe move is
+left and the board falls apart into independent chains and loops. The
+player to move must open one of them, and the opponent (the controller)
+either takes every box or takes all but the last 2 (4 for a loop) and
+hands them back to keep control. That choice has a closed form, so the
+exact value of the position is a small recursion over component lengths
+instead of a full game-tree search.
+
+The board is described by the tables of a dab_engine.Geometry:
+`box_masks[bi]` is the edge mask of box bi and `edge_boxes[e]` lists
+(box index, box mask) for the boxes next to edge e.
+"""
+from functools import lru_cache
+
+CHAIN, LOOP = 0, 1
+
+
+def find_components(edges, box_masks, edge_boxes):
+    """
+    Splits a position into chains and loops.
+    Returns a list of (kind, boxes, component_edges) or None when the
+    position is not a pure chain/loop endgame, i.e. some unfinished box
+    does not have exactly two sides drawn.
+    """
+    open_boxes = []
+    for bi, mask in enumerate(box_masks):
+        sides = (edges & mask).bit_count()
+        if sides == 2:
+            open_boxes.append(bi)
+        elif sides != 4:
+            return None
+
+    seen = set()
+    parts = []
+    for start in open_boxes:
+        if start in seen:
+            continue
+        seen.add(start)
+        comp_boxes, comp_edges = [start], set()
+        stack = [start]
+        while stack:
+            bi = stack.pop()
+            free = box_masks[bi] & ~edges
+            while free:
+                low = free & -free
+                free ^= low
+                e = low.bit_length() - 1
+                comp_edges.add(e)
+                for other, _ in edge_boxes[e]:
+                    if other not in seen:
+                        seen.add(other)
+                        comp_boxes.append(other)
+                        stack.append(other)
+        # a loop has one edge per box, a chain one more (both ends on the border)
+        kind = LOOP if len(comp_edges) == len(comp_boxes) else CHAIN
+        parts.append((kind, len(comp_boxes), sorted(comp_edges)))
+    return parts
+
+
+@lru_cache(maxsize=None)
+def controlled_value(parts):
+    """
+    Net boxes for the player who must open a component next, over the
+    boxes still in play. `parts` is a sorted tuple of (kind, length).
+    """
+    if not parts:
+        return 0
+    best = None
+    for i, part in enumerate(parts):
+        if i and parts[i - 1] == part:
+            continue
+        rest = controlled_value(parts[:i] + parts[i + 1:])
+        best_open = _opened_value(part, rest)
+        if best is None or best_open > best:
+            best = best_open
+    return best
+
+
+def _opened_value(part, rest):
+    """Value for the opener of `part` when the remaining components are worth `rest`."""
+    kind, n = part
+    # controller takes everything, then has to open the next component
+    take_all = -n - rest
+    if kind == LOOP:
+        # controller leaves 4 boxes to the opener, who must then move again
+        return min(take_all, 8 - n + rest)
+    if n >= 3:
+        # controller leaves the last 2 boxes of the chain (double-dealing)
+        return min(take_all, 4 - n + rest)
+    # 1- and 2-chains opened in the middle cannot be double-dealt
+    return take_all
+
+
+def _opening_edge(kind, n, comp_edges, edge_boxes):
+    """The edge to draw when opening a component."""
+    if kind == CHAIN:
+        if n == 2:
+            # hard-hearted handout: split the 2-chain so it cannot be declined
+            return next(e for e in comp_edges if len(edge_boxes[e]) == 2)
+        # a chain ends on the border, where an edge touches a single box
+        return next(e for e in comp_edges if len(edge_boxes[e]) == 1)
+    return comp_edges[0]
+
+
+def solve(edges, box_masks, edge_boxes):
+    """
+    Solves a chain/loop endgame for the player to move.
+    Returns (net_value_of_remaining_boxes, move), or None when the position
+    does not qualify (see find_components) or has no empty edges.
+    """
+    parts = find_components(edges, box_masks, edge_boxes)
+    if not parts:
+        return None
+    key = tuple(sorted((kind, n) for kind, n, _ in parts))
+    best_val, best_move = None, None
+    for kind, n, comp_edges in parts:
+        rest = controlled_value(_without(key, (kind, n)))
+        val = _opened_value((kind, n), rest)
+        if best_val is None or val > best_val:
+            best_val = val
+            best_move = _opening_edge(kind, n, comp_edges, edge_boxes)
+    return best_val, best_move
+
+
+def _without(parts, part):
+    i = parts.index(part)
+    return parts[:i] + parts[i + 1:]
@@ -0,0 +1,1281 @@
+"""
+Headless Dots and Boxes engine: board geometry, bitboard state and the
+alpha-beta search. Nothing here imports tkinter, so the AI can be used from
+scripts, servers and the command line as well as from the GUI in
+dab_prototype.
+
+    import dab_engine
+    state = dab_engine.BoardState(dab_engine.geometry(4), edges=0b101)
+    move, value = dab_engine.choose_move(state, budget=0.5)
+
+or from a shell (rectangular boards as ROWSxCOLS, e.g. --size 3x5):
+
+    python dab_engine.py --size 4 --edges 0,2 --budget 0.5
+"""
+import argparse
+import json
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from functools import lru_cache
+from multiprocessing import shared_memory
+import multiprocessing
+from operator import xor
+import os
+import queue
+import random
+import sys
+import threading
+import time
+import weakref
+
+import dab_endgame
+from dab_patterndb import PatternDB, load_pattern_db
+from dab_solvedb import load_solved_db
+
+# Pemain
+HUMAN, AI = 1, 2
+
+# Jenis entri cache minimax (alpha-beta)
+EXACT, LOWER, UPPER = 0, 1, 2
+
+# Ukuran transposition table dalam entri (dibulatkan ke pangkat dua,
+# 16 bytes per entri -> 16 MB)
+TT_MAX_ENTRIES = 1 << 20
+
+# Anggaran waktu AI per langkah (detik)
+AI_MOVE_BUDGET = 1.5
+
+# Jumlah proses untuk membagi langkah-langkah root (0 = satu proses saja).
+# Papan dengan sisa sisi kurang dari PARALLEL_MIN_EMPTY dicari tanpa pool.
+AI_WORKERS = max(0, (os.cpu_count() or 1) - 1)
+PARALLEL_MIN_EMPTY = 14
+# File JSON lines untuk statistik setiap pencarian EngineWorker (None = tidak ditulis)
+STATS_LOG = os.environ.get("DAB_STATS_LOG") or None
+
+# Bobot evaluasi daun: bagian dari kotak tersisa yang diperkirakan jatuh ke
+# pemain yang memegang kontrol rantai (lihat evaluate)
+CONTROL_SHARE = 0.5
+
+# Seberapa sering (detik) split root memeriksa deadline/stop sambil menunggu pool
+SPLIT_POLL = 0.02
+
+# Analisis multi-PV: nilai sisi yang lebih buruk dari ANALYSIS_SPREAD kotak
+# dibanding langkah terbaik hanya dihitung sebagai batas atas
+ANALYSIS_SPREAD = 3
+
+# Mesin pencarian: "alphabeta" (Searcher) atau "mcts" (dab_mcts.MCTSSearcher).
+# "auto" memakai alpha-beta di semua ukuran papan: dengan waktu yang sama MCTS
+# masih kalah darinya di self-play (juga di 5x5 ke atas), jadi MCTS harus dipilih sendiri.
+ENGINE_KINDS = ("auto", "alphabeta", "mcts")
+
+# Ukuran papan default (titik per sisi) untuk GUI dan command line
+GRID_SIZE = 4
+
+
+class Geometry:
+    """
+    Read-only tables of one board shape with `rows` x `cols` dots: edge and
+    box numbering, edge -> box adjacency, bitmasks, symmetries and Zobrist
+    keys. Use geometry(), which builds every shape once per process, so
+    searches of different boards can run side by side.
+
+    Edges are numbered horizontal first, row by row, then vertical row by
+    row. `boxes[bi]` is (top, bottom, left, right) and `edge_boxes[e]` lists
+    (box index, box edge mask) for the 1-2 boxes next to edge e.
+    `zobrist[e]` holds the 64-bit key of edge e's image under every symmetry.
+    """
+
+    __slots__ = ("rows", "cols", "name", "num_h_edges", "num_v_edges", "total_edges",
+                 "boxes", "box_masks", "edge_boxes", "full_mask", "symmetries", "zobrist")
+
+    def __init__(self, rows, cols):
+        init = super().__setattr__
+        init("rows", rows)
+        init("cols", cols)
+        init("name", f"{rows}x{cols}")
+        num_h = rows * (cols - 1)
+        init("num_h_edges", num_h)
+        init("num_v_edges", (rows - 1) * cols)
+        init("total_edges", num_h + (rows - 1) * cols)
+
+        # Membuat default atau semacam container untuk menggabungkan edges dengan dots sehingga membentuk kotak
+        boxes = []
+        for r in range(rows - 1):
+            for c in range(cols - 1):
+                top = r * (cols - 1) + c
+                bottom = (r + 1) * (cols - 1) + c
+                left = num_h + r * cols + c
+                right = num_h + r * cols + (c + 1)
+                boxes.append((top, bottom, left, right))
+        init("boxes", tuple(boxes))
+
+        # Precomputed edge -> adjacent box table so a move only checks its own boxes
+        box_masks = tuple((1 << t) | (1 << b) | (1 << l) | (1 << r) for t, b, l, r in boxes)
+        adjacent = [[] for _ in range(self.total_edges)]
+        for bi, sides in enumerate(boxes):
+            for e in sides:
+                adjacent[e].append((bi, box_masks[bi]))
+        init("box_masks", box_masks)
+        init("edge_boxes", tuple(tuple(a) for a in adjacent))
+        init("full_mask", (1 << self.total_edges) - 1)
+        symmetries = _build_symmetries(rows, cols)
+        init("symmetries", symmetries)
+        # seeded by the shape, so every process (and a shared table) agrees on the keys
+        rng = random.Random(self.name)
+        keys = [rng.getrandbits(64) for _ in range(self.total_edges)]
+        init("zobrist", tuple(tuple(keys[perm[e]] for perm, _ in symmetries)
+                              for e in range(self.total_edges)))
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Geometry objects are read-only")
+
+    def __reduce__(self):
+        # pickled by shape only; the receiving process uses its own cached copy
+        return geometry, (self.rows, self.cols)
+
+    def __repr__(self):
+        return f"<Geometry {self.name}>"
+
+
+def geometry(rows, cols=None):
+    """The shared Geometry of a rows x cols board (cols defaults to rows)."""
+    cols = rows if cols is None else cols
+    if rows < 2 or cols < 2:
+        raise ValueError(f"a board needs at least 2x2 dots, not {rows}x{cols}")
+    return _geometry(rows, cols)
+
+
+@lru_cache(maxsize=None)
+def _geometry(rows, cols):
+    return Geometry(rows, cols)
+
+
+def parse_geometry(text):
+    """'4' -> the 4x4 Geometry, '3x5' -> the 3x5 one; for command lines."""
+    rows, _, cols = str(text).lower().partition("x")
+    try:
+        return geometry(int(rows), int(cols) if cols else None)
+    except ValueError as err:
+        raise ValueError(f"bad board size {text!r}: {err}") from None
+
+
+def _build_symmetries(rows, cols):
+    """
+    The rotations/reflections of the dot grid: 8 for a square board, 4 for
+    a rectangular one. Each symmetry is (edge_perm, inverse_edge_perm),
+    mapping single edge indices.
+    """
+    last_r, last_c = rows - 1, cols - 1
+    transforms = [
+        lambda r, c: (r, c),
+        lambda r, c: (last_r - r, last_c - c),
+        lambda r, c: (r, last_c - c),
+        lambda r, c: (last_r - r, c),
+    ]
+    if rows == cols:
+        # quarter turns and diagonal mirrors only fit a square
+        transforms += [
+            lambda r, c: (c, last_r - r),
+            lambda r, c: (last_c - c, r),
+            lambda r, c: (c, r),
+            lambda r, c: (last_c - c, last_r - r),
+        ]
+
+    # every edge as the pair of dots it joins, same order as the edge indices
+    edge_dots = []
+    for r in range(rows):
+        for c in range(cols - 1):
+            edge_dots.append(((r, c), (r, c + 1)))
+    for r in range(rows - 1):
+        for c in range(cols):
+            edge_dots.append(((r, c), (r + 1, c)))
+    edge_index = {frozenset(dots): i for i, dots in enumerate(edge_dots)}
+
+    symmetries = []
+    for t in transforms:
+        edge_perm = [edge_index[frozenset((t(*a), t(*b)))] for a, b in edge_dots]
+        inverse = [0] * len(edge_perm)
+        for i, j in enumerate(edge_perm):
+            inverse[j] = i
+        symmetries.append((tuple(edge_perm), tuple(inverse)))
+    return tuple(symmetries)
+
+
+class SearchTimeout(Exception):
+    """Raised inside the search when the per-move deadline has passed or it was stopped."""
+
+
+class SearchStats:
+    """
+    Counters of one search. `depth` is the deepest iteration that completed
+    (for MCTS: the deepest tree node reached), `expanded`/`children` give the
+    average number of moves actually searched per interior node.
+    """
+
+    __slots__ = ("engine", "size", "nodes", "tt_probes", "tt_hits", "tt_cutoffs",
+                 "cutoffs", "expanded", "children", "playouts", "depth", "wall_time",
+                 "stopped")
+
+    def __init__(self, geom, engine="alphabeta"):
+        self.engine = engine
+        self.size = geom.name
+        self.nodes = self.tt_probes = self.tt_hits = self.tt_cutoffs = 0
+        self.cutoffs = self.expanded = self.children = self.playouts = 0
+        self.depth = 0
+        self.wall_time = 0.0
+        # True when the deadline or a stop request ended the search
+        self.stopped = False
+
+    def merge(self, other):
+        """Adds the counters of a pool task's search."""
+        for name in ("nodes", "tt_probes", "tt_hits", "tt_cutoffs", "cutoffs",
+                     "expanded", "children"):
+            setattr(self, name, getattr(self, name) + getattr(other, name))
+
+    def as_dict(self):
+        record = {name: getattr(self, name) for name in self.__slots__}
+        record["wall_time"] = round(self.wall_time, 4)
+        record["nodes_per_sec"] = round(self.nodes / self.wall_time) if self.wall_time else 0
+        record["tt_hit_rate"] = round(self.tt_hits / self.tt_probes, 3) if self.tt_probes else 0.0
+        record["branching"] = round(self.children / self.expanded, 2) if self.expanded else 0.0
+        return record
+
+    def summary(self):
+        """One-line form for the GUI's debug line."""
+        rec = self.as_dict()
+        if self.engine == "mcts":
+            return (f"mcts  depth {self.depth}  {self.playouts} playouts  "
+                    f"{rec['nodes_per_sec']} it/s  {self.wall_time:.2f}s")
+        return (f"depth {self.depth}  {self.nodes} nodes  {rec['nodes_per_sec']} n/s  "
+                f"tt {rec['tt_hit_rate']:.0%}  br {rec['branching']}  {self.wall_time:.2f}s")
+
+
+class TranspositionTable:
+    """
+    Fixed-size cache of search results for one board Geometry, stored as a
+    flat array of 64-bit words: 16 bytes per entry, however full it is.
+    Each position is stored once for all its symmetric images, under the
+    smallest of their Zobrist hashes, with the depth it was searched to,
+    the bound type and the best move.
+
+    Entries sit in buckets of two. The first slot keeps the deepest result
+    of the current search (depth-preferred), the second takes whatever
+    does not get in there, so new results are always stored. share() moves
+    the table into multiprocessing shared memory, where the pool workers
+    attach() to it and read and write the same entries without locks:
+    a word pair torn by two concurrent stores fails the key check and
+    reads as a miss.
+
+    Values are relative to the side to move and count only the boxes still
+    in play, so the key is the edge set alone: box ownership and whose turn
+    it is do not change what the remaining boxes are worth to the mover.
+    """
+
+    # word 0 holds the search generation, entries start at word 2
+    HEADER_WORDS = 2
+    # data word: flag+1 in bits 0-1, then depth, best move+1 and value+VALUE_BIAS
+    # in FIELD_BITS each, the generation above them
+    FIELD_BITS = 10
+    FIELD_MASK = (1 << FIELD_BITS) - 1
+    VALUE_BIAS = 1 << (FIELD_BITS - 1)
+    MAX_EDGES = FIELD_MASK - 1
+
+    def __init__(self, geom, max_entries=TT_MAX_ENTRIES, _shm=None):
+        if geom.total_edges > self.MAX_EDGES:
+            raise ValueError(f"a {geom.name} board has {geom.total_edges} edges, the "
+                             f"transposition table holds at most {self.MAX_EDGES}")
+        self.geom = geom
+        self._shm = _shm
+        if _shm is None:
+            # largest power of two that fits, two entries (one bucket) at least
+            entries = 1 << max(1, max_entries.bit_length() - 1)
+            buf = bytearray(8 * (self.HEADER_WORDS + 2 * entries))
+        else:
+            buf = _shm.buf
+        self._raw = memoryview(buf)
+        self._words = self._raw.cast("Q")
+        self.max_entries = (len(self._words) - self.HEADER_WORDS) // 2
+        self._bucket_mask = self.max_entries // 2 - 1
+        self._release = None
+
+    @classmethod
+    def attach(cls, geom, name):
+        """The table another process share()d under `name`."""
+        table = cls(geom, _shm=shared_memory.SharedMemory(name=name))
+        table._release = weakref.finalize(table, _release_table, table._words, table._raw,
+                                          table._shm, False)
+        return table
+
+    @property
+    def name(self):
+        """Shared memory name, or None while the table is private to this process."""
+        return None if self._shm is None else self._shm.name
+
+    def share(self):
+        """Moves the table into shared memory (once) and returns its name."""
+        if self._shm is None:
+            shm = shared_memory.SharedMemory(create=True, size=len(self._raw))
+            shm.buf[:] = self._raw
+            self._words.release()
+            self._raw.release()
+            self._shm = shm
+            self._raw = memoryview(shm.buf)
+            self._words = self._raw.cast("Q")
+            self._release = weakref.finalize(self, _release_table, self._words, self._raw,
+                                             shm, True)
+        return self._shm.name
+
+    def close(self):
+        """Unmaps a shared table, and removes it if this process created it."""
+        if self._release is not None:
+            self._release()
+
+    def __len__(self):
+        """Entries in use (counts the whole array, so not for the hot path)."""
+        return self.max_entries - self._words[self.HEADER_WORDS + 1::2].tolist().count(0)
+
+    def clear(self):
+        self._raw[:] = bytes(len(self._raw))
+
+    def new_search(self):
+        """Starts a search generation: older entries lose their depth-preferred slots."""
+        self._words[0] = (self._words[0] + 1) & 255
+
+    def hashes(self, edges):
+        """Zobrist hashes of an edge mask under every symmetry, computed from scratch."""
+        out = [0] * len(self.geom.symmetries)
+        zobrist = self.geom.zobrist
+        while edges:
+            low = edges & -edges
+            edges ^= low
+            out = list(map(xor, out, zobrist[low.bit_length() - 1]))
+        return tuple(out)
+
+    def probe(self, hashes):
+        """
+        Returns (key, symmetry, entry) for the position with Zobrist
+        `hashes`. `entry` is None or (value, flag, depth, best_move) with
+        best_move in the caller's frame.
+        """
+        key = min(hashes)
+        sym = hashes.index(key)
+        words = self._words
+        i = self.HEADER_WORDS + ((key & self._bucket_mask) << 2)
+        for j in (i, i + 2):
+            data = words[j + 1]
+            if data and words[j] ^ data == key:
+                mask = self.FIELD_MASK
+                move = (data >> 12 & mask) - 1
+                return key, sym, ((data >> 22 & mask) - self.VALUE_BIAS, (data & 3) - 1,
+                                  data >> 2 & mask,
+                                  None if move < 0 else self.geom.symmetries[sym][1][move])
+        return key, sym, None
+
+    def store(self, key, sym, value, flag, depth, best_move):
+        """Stores a result under a key/symmetry pair returned by probe()."""
+        words = self._words
+        generation = words[0]
+        move = 0 if best_move is None else self.geom.symmetries[sym][0][best_move] + 1
+        data = ((flag + 1) | depth << 2 | move << 12 | (value + self.VALUE_BIAS) << 22
+                | generation << 32)
+        i = self.HEADER_WORDS + ((key & self._bucket_mask) << 2)
+        for j in (i, i + 2):
+            old = words[j + 1]
+            if old and words[j] ^ old == key:
+                break
+        else:
+            old = words[i + 1]
+            if not old or old >> 32 != generation or depth >= (old >> 2 & self.FIELD_MASK):
+                if old:
+                    # the depth-preferred entry moves down to the second slot
+                    words[i + 2] = words[i]
+                    words[i + 3] = old
+                j = i
+            else:
+                j = i + 2
+        words[j] = key ^ data
+        words[j + 1] = data
+
+
+def _release_table(words, raw, shm, unlink):
+    """Finalizer of a shared TranspositionTable: unmaps (and unlinks) its memory."""
+    words.release()
+    raw.release()
+    shm.close()
+    if unlink:
+        shm.unlink()
+
+
+class BoardState:
+    """
+    Compact game state for the search: drawn edges as one int bitmask and
+    box ownership as one bitmask per player, on the board `geom`. make/unmake
+    update the state in place, so the search never copies lists or rebuilds
+    tuples.
+    """
+    __slots__ = ("geom", "edges", "owned")
+
+    def __init__(self, geom, edges=0, human_boxes=0, ai_boxes=0):
+        self.geom = geom
+        self.edges = edges
+        # indexed by player id: owned[HUMAN], owned[AI]
+        self.owned = [0, human_boxes, ai_boxes]
+
+    @classmethod
+    def from_lists(cls, geom, edge_state, box_owner):
+        """Builds a state from the GUI's edge_state/box_owner sequences."""
+        edges = human = ai = 0
+        for i, e in enumerate(edge_state):
+            if e:
+                edges |= 1 << i
+        for i, b in enumerate(box_owner):
+            if b == HUMAN:
+                human |= 1 << i
+            elif b == AI:
+                ai |= 1 << i
+        return cls(geom, edges, human, ai)
+
+    def copy(self):
+        return BoardState(self.geom, self.edges, self.owned[HUMAN], self.owned[AI])
+
+    def make(self, move, player):
+        """Draws edge `move` for `player`, returns the mask of boxes it completed."""
+        edges = self.edges | (1 << move)
+        self.edges = edges
+        captured = 0
+        for bi, mask in self.geom.edge_boxes[move]:
+            if edges & mask == mask:
+                captured |= 1 << bi
+        if captured:
+            self.owned[player] |= captured
+        return captured
+
+    def unmake(self, move, player, captured):
+        """Reverts a make() call."""
+        self.edges &= ~(1 << move)
+        if captured:
+            self.owned[player] &= ~captured
+
+    def empty_edges(self):
+        moves = []
+        free = self.geom.full_mask & ~self.edges
+        while free:
+            low = free & -free
+            moves.append(low.bit_length() - 1)
+            free ^= low
+        return moves
+
+    def move_classes(self):
+        """
+        Empty edges split into (captures, safe moves, sacrifices): moves that
+        complete a box, moves that give no box away, and moves that hand the
+        opponent a box.
+        """
+        edges = self.edges
+        edge_boxes = self.geom.edge_boxes
+        captures, safe, sacrifices = [], [], []
+        for m in self.empty_edges():
+            sides = 0
+            for _, mask in edge_boxes[m]:
+                sides = max(sides, (edges & mask).bit_count())
+            if sides == 3:
+                captures.append(m)
+            elif sides == 2:
+                sacrifices.append(m)
+            else:
+                safe.append(m)
+        return captures, safe, sacrifices
+
+    def ordered_moves(self, first=None):
+        """
+        Empty edges ordered for alpha-beta: captures (complete a box) first,
+        then safe moves, then moves that hand the opponent a box.
+        `first` (the cached best move) goes in front of everything.
+        """
+        captures, safe, sacrifices = self.move_classes()
+        moves = captures + safe + sacrifices
+        if first is not None and first in moves:
+            moves.remove(first)
+            moves.insert(0, first)
+        return moves
+
+    def is_full(self):
+        return self.edges == self.geom.full_mask
+
+    def score(self):
+        """Box difference from the AI's point of view."""
+        return self.owned[AI].bit_count() - self.owned[HUMAN].bit_count()
+
+
+def leaf_features(geom, edges):
+    """
+    Quiescence and safe-move count of a position, see evaluate(). Returns
+    (boxes taken, edges after the captures, safe moves left, boxes still
+    open, mask of the boxes with two sides after the captures).
+    """
+    box_masks, edge_boxes = geom.box_masks, geom.edge_boxes
+    sides = [(edges & mask).bit_count() for mask in box_masks]
+    taken = 0
+    pending = [bi for bi, n in enumerate(sides) if n == 3]
+    while pending:
+        bi = pending.pop()
+        if sides[bi] != 3:
+            continue
+        free = box_masks[bi] & ~edges
+        edges |= free
+        for bj, _ in edge_boxes[free.bit_length() - 1]:
+            sides[bj] += 1
+            if sides[bj] == 4:
+                taken += 1
+            elif sides[bj] == 3:
+                pending.append(bj)
+    twos = 0
+    for bi, n in enumerate(sides):
+        if n == 2:
+            twos |= 1 << bi
+
+    safe = 0
+    free = geom.full_mask & ~edges
+    while free:
+        low = free & -free
+        free ^= low
+        around = edge_boxes[low.bit_length() - 1]
+        if all(sides[bj] < 2 for bj, _ in around):
+            safe += 1
+            for bj, _ in around:
+                sides[bj] += 1
+    return taken, edges, safe, sum(1 for n in sides if n < 4), twos
+
+
+def control_estimate(remaining, safe):
+    """
+    Parity part of evaluate(): CONTROL_SHARE of the `remaining` boxes, for
+    the mover if an odd number of `safe` moves is left, else against it.
+    """
+    control = int(CONTROL_SHARE * remaining / (1 + safe))
+    return control if safe % 2 else -control
+
+
+def evaluate(geom, edges, patterns=None):
+    """
+    Estimated net boxes still to be won by the side to move, for positions
+    cut off by the depth limit.
+
+    Quiescence: boxes with three sides are taken first, following the chain
+    reactions they trigger, because the mover always can. Then the safe
+    moves left (moves that give no box away) are counted by playing them
+    greedily; their parity says who will have to open the first chain, and
+    the other player, in control, is credited CONTROL_SHARE of the boxes
+    still open. After a run of captures the mover may also decline the last
+    two boxes to hand control over, which is scored as well.
+
+    `patterns` (a dab_patterndb.PatternDB) adds its correction for the
+    local shapes of the position after the captures, taken from exact
+    solutions of small windows of the board.
+    """
+    taken, edges, safe, remaining, twos = leaf_features(geom, edges)
+    if not remaining:
+        return taken
+    # an even number of safe moves leaves the mover to open the first chain
+    control = control_estimate(remaining, safe)
+    if taken >= 2:
+        # all but two boxes, then the opponent takes those and moves next
+        value = max(taken + control, taken - 4 - control)
+    else:
+        value = taken + control
+    if patterns is not None:
+        value += patterns.lookup(edges, safe, twos)
+    return value
+
+
+class Searcher:
+    """
+    Alpha-beta search engine for one board Geometry, independent of the GUI.
+    Owns the transposition table and the per-search deadline; with `workers`
+    > 0 the root moves of large positions are split across a shared process
+    pool. When a solved database (`db`) is given, every position is
+    answered by a lookup; a pattern database (`patterns`) refines the
+    evaluation at depth cutoffs.
+    """
+
+    def __init__(self, geom, workers=0, tt=None, db=None, leaf_eval=True, patterns=None):
+        self.geom = geom
+        self.workers = workers
+        # False: depth cutoffs score 0 instead of calling evaluate()
+        self.leaf_eval = leaf_eval
+        self.patterns = patterns
+        self.tt = tt if tt is not None else TranspositionTable(geom)
+        self.db = db
+        # per-search deadline (None = no limit) and stop event (pondering)
+        self._deadline = None
+        self._stop = None
+        # counters of the last search; stats.nodes also paces the time checks
+        self.stats = SearchStats(geom)
+
+    def reset(self):
+        """Forgets everything learned about the current game (new game)."""
+        self.tt.clear()
+
+    def minimax(self, edges, boxes, player, depth=None):
+        """
+        Alpha-beta minimax with optional depth limit.
+        Returns (score_from_AI_pov, best_move).
+        """
+        state = BoardState.from_lists(self.geom, edges, boxes)
+        if depth is None:
+            # no position needs more plies than it has empty edges
+            depth = self.geom.total_edges
+        self._deadline = None
+        self.stats = SearchStats(self.geom)
+        self.tt.new_search()
+        val, move = self._negamax(state, player, depth, -999, 999, self.tt.hashes(state.edges))
+        return self._banked(state, player, val), move
+
+    def search(self, edges, boxes, player, deadline=None, stop=None):
+        """Iterative deepening on the GUI's edge_state/box_owner lists, see search_state."""
+        return self.search_state(BoardState.from_lists(self.geom, edges, boxes),
+                                 player, deadline, stop)
+
+    def search_state(self, state, player, deadline=None, stop=None, max_depth=None,
+                     workers=None):
+        """
+        Iterative deepening: searches depth 1, 2, ... until the position is
+        solved, `max_depth` is done, `deadline` (a time.perf_counter() value)
+        passes or the threading.Event `stop` is set. Returns (score_from_AI_pov, best_move)
+        of the last depth that completed. Results stay in the transposition
+        table, so pondering a position with `stop` speeds up later searches.
+        `workers` overrides self.workers for this search only.
+        """
+        work = state.copy()
+        empty = len(state.empty_edges())
+        workers = self.workers if workers is None else workers
+        parallel = workers > 0 and self.db is None and empty >= PARALLEL_MIN_EMPTY
+        result = (0, None)
+        self._deadline = deadline
+        self._stop = stop
+        stats = self.stats = SearchStats(self.geom)
+        start = time.perf_counter()
+        self.tt.new_search()
+        hashes = self.tt.hashes(state.edges)
+        try:
+            for depth in range(1, min(empty, max_depth or empty) + 1):
+                if parallel:
+                    result = self._split_root(work, player, depth, hashes, workers)
+                else:
+                    result = self._negamax(work, player, depth, -999, 999, hashes)
+                stats.depth = depth
+        except SearchTimeout:
+            # the interrupted iteration is discarded along with the scratch copy
+            stats.stopped = True
+        finally:
+            self._deadline = None
+            self._stop = None
+            stats.wall_time = time.perf_counter() - start
+        val, move = result
+        if move is None and empty:
+            move = state.ordered_moves()[0]
+        return self._banked(state, player, val), move
+
+    def analyse(self, state, player, deadline=None, stop=None, on_update=None, max_depth=None):
+        """
+        Multi-PV analysis: iterative deepening over every empty edge of
+        `state` instead of only the best one. After each depth,
+        on_update(depth, values) gets {edge: final box margin `player` can
+        expect after drawing it}, counting the boxes both sides already own.
+        Only moves within ANALYSIS_SPREAD of the best get an exact value, the
+        others an upper bound, which keeps the search windows narrow. The
+        transposition table is shared with search_state, so analysing a
+        position also prepares the reply to it. Runs until the position is
+        solved, `max_depth`, `deadline` or `stop`; returns (depth, values)
+        of the last depth that completed.
+        """
+        work = state.copy()
+        moves = state.ordered_moves()
+        banked = state.score() if player == AI else -state.score()
+        last = min(len(moves), max_depth or len(moves))
+        if self.db is not None:
+            # every child is a database lookup: one pass is already exact
+            last = min(last, 1)
+        done, values = 0, {}
+        self._deadline = deadline
+        self._stop = stop
+        stats = self.stats = SearchStats(self.geom)
+        start = time.perf_counter()
+        self.tt.new_search()
+        hashes = self.tt.hashes(state.edges)
+        try:
+            for depth in range(1, last + 1):
+                scores = {}
+                best = None
+                # best moves of the previous depth first, for the narrowest windows
+                for m in sorted(moves, key=lambda m: -values.get(m, 0)):
+                    if best is None:
+                        val = best = self._child_value(work, player, m, depth, -999, 999, hashes)
+                    else:
+                        val = self._child_value(work, player, m, depth,
+                                                best - ANALYSIS_SPREAD, best + 1, hashes)
+                        if val > best:
+                            # a new best move: its exact value needs a full window
+                            val = best = self._child_value(work, player, m, depth,
+                                                           -999, 999, hashes)
+                    scores[m] = val
+                done, values = depth, {m: banked + v for m, v in scores.items()}
+                stats.depth = depth
+                if on_update is not None:
+                    on_update(depth, dict(values))
+        except SearchTimeout:
+            stats.stopped = True
+        finally:
+            self._deadline = None
+            self._stop = None
+            stats.wall_time = time.perf_counter() - start
+        return done, values
+
+    @staticmethod
+    def _banked(state, player, val):
+        """Turns a value of the remaining boxes for `player` into the AI's final margin."""
+        return state.score() + (val if player == AI else -val)
+
+    def _split_root(self, state, player, depth, hashes, workers):
+        """
+        Young-brothers-wait split of the root: the first (cached best) move is
+        searched here to get an alpha bound, then the other moves are searched
+        in the pool of `workers` processes. The shared alpha is raised as
+        better moves come back; running tasks check it along with their
+        deadline and restart their move on the narrower window. When this
+        search stops early, the shared abort counter is bumped so running pool
+        tasks stop too.
+        The transposition table is moved to shared memory, so the workers
+        search with (and add to) the same table, and with this searcher's
+        evaluation settings (only searches without a solved db are split).
+
+        Not re-entrant: the pool and its alpha/abort counters belong to one
+        split at a time (see _SPLIT_LOCK). A search that finds them taken by
+        another thread searches this depth on its own instead.
+        """
+        if not _SPLIT_LOCK.acquire(blocking=False):
+            return self._negamax(state, player, depth, -999, 999, hashes)
+        try:
+            return self._split_root_locked(state, player, depth, hashes, workers)
+        finally:
+            _SPLIT_LOCK.release()
+
+    def _split_root_locked(self, state, player, depth, hashes, workers):
+        key, sym, entry = self.tt.probe(hashes)
+        moves = state.ordered_moves(entry[3] if entry is not None else None)
+        best_move = moves[0]
+        best_val = self._child_value(state, player, best_move, depth, -999, 999, hashes)
+
+        pool, shared_alpha, abort = _get_pool(workers)
+        shared_alpha.value = best_val
+        seconds = None if self._deadline is None else self._deadline - time.perf_counter()
+        tt_name = self.tt.share()
+        patterns = None if self.patterns is None else self.patterns.path
+        futures = {pool.submit(_search_root_move, self.geom, state.edges, m, depth,
+                               seconds, abort.value, tt_name, self.leaf_eval, patterns): m
+                   for m in moves[1:]}
+        pending = set(futures)
+        try:
+            while pending:
+                done, pending = wait(pending, timeout=SPLIT_POLL, return_when=FIRST_COMPLETED)
+                if self._out_of_time():
+                    raise SearchTimeout()
+                for fut in done:
+                    val, task_stats = fut.result()
+                    self.stats.merge(task_stats)
+                    if val is None:
+                        raise SearchTimeout()
+                    if val > best_val:
+                        best_val, best_move = val, futures[fut]
+                        with shared_alpha.get_lock():
+                            shared_alpha.value = max(shared_alpha.value, val)
+        finally:
+            for fut in futures:
+                fut.cancel()
+            if pending:
+                abort.value += 1
+        # the first move had a full window and the rest were searched above its value
+        self.tt.store(key, sym, best_val, EXACT, depth, best_move)
+        return best_val, best_move
+
+    def _child_value(self, state, player, move, depth, alpha, beta, hashes):
+        """Value of `move` for `player`, searched to `depth` - 1 below it."""
+        hashes = tuple(map(xor, hashes, self.geom.zobrist[move]))
+        captured = state.make(move, player)
+        if captured:
+            gained = captured.bit_count()
+            val = gained + self._negamax(state, player, depth - 1,
+                                         alpha - gained, beta - gained, hashes)[0]
+        else:
+            other = HUMAN if player == AI else AI
+            val = -self._negamax(state, other, depth - 1, -beta, -alpha, hashes)[0]
+        state.unmake(move, player, captured)
+        return val
+
+    def _out_of_time(self):
+        if self._stop is not None and self._stop.is_set():
+            return True
+        return self._deadline is not None and time.perf_counter() > self._deadline
+
+    def _negamax(self, state, player, depth, alpha, beta, hashes):
+        """
+        Recursive alpha-beta search on a BoardState using in-place make/unmake.
+        `hashes` are the Zobrist hashes of state.edges (see
+        TranspositionTable), updated with one XOR per symmetry and move; they
+        are only needed while depth > 0, so leaves get None.
+        Returns (net boxes still to be won by the side to move, best_move);
+        boxes already owned are not part of the value, so positions with the
+        same edges share one table entry.
+        A move that completes a box keeps the same player to move: its value
+        is the boxes taken plus the child's value from the same point of view,
+        instead of the negated value of an alternating ply.
+        """
+        stats = self.stats
+        stats.nodes += 1
+        if not stats.nodes & 1023 and self._out_of_time():
+            raise SearchTimeout()
+
+        edges = state.edges
+        geom = self.geom
+        if edges == geom.full_mask:
+            return 0, None
+        # precomputed database -> exact value and move in one lookup
+        if self.db is not None:
+            return self.db.lookup(edges)
+        # only chains and loops left -> exact value from the endgame solver
+        solved = dab_endgame.solve(edges, geom.box_masks, geom.edge_boxes)
+        if solved is not None:
+            return solved
+        # depth cutoff -> quiescence over pending captures plus chain-parity estimate
+        # (and the pattern tables, if any)
+        if depth <= 0:
+            return (evaluate(geom, edges, self.patterns) if self.leaf_eval else 0), None
+
+        key, sym, entry = self.tt.probe(hashes)
+        stats.tt_probes += 1
+        cached_move = None
+        if entry is not None:
+            stats.tt_hits += 1
+            val, flag, entry_depth, cached_move = entry
+            if entry_depth >= depth:
+                if flag == EXACT:
+                    stats.tt_cutoffs += 1
+                    return val, cached_move
+                if flag == LOWER:
+                    alpha = max(alpha, val)
+                else:
+                    beta = min(beta, val)
+                if alpha >= beta:
+                    stats.tt_cutoffs += 1
+                    return val, cached_move
+
+        stats.expanded += 1
+        alpha0 = alpha
+        other = HUMAN if player == AI else AI
+        best_val, best_move = -999, None
+        zobrist = geom.zobrist
+        # same as _child_value, inlined on the hot path
+        for m in state.ordered_moves(cached_move):
+            stats.children += 1
+            child = tuple(map(xor, hashes, zobrist[m])) if depth > 1 else None
+            captured = state.make(m, player)
+            if captured:
+                gained = captured.bit_count()
+                val = gained + self._negamax(state, player, depth - 1,
+                                             alpha - gained, beta - gained, child)[0]
+            else:
+                val = -self._negamax(state, other, depth - 1, -beta, -alpha, child)[0]
+            state.unmake(m, player, captured)
+            if val > best_val:
+                best_val, best_move = val, m
+                alpha = max(alpha, val)
+                if alpha >= beta:
+                    stats.cutoffs += 1
+                    break
+
+        if best_val <= alpha0:
+            flag = UPPER
+        elif best_val >= beta:
+            flag = LOWER
+        else:
+            flag = EXACT
+        self.tt.store(key, sym, best_val, flag, depth, best_move)
+        return best_val, best_move
+
+
+# ===== API tanpa GUI =====
+# One Searcher (and transposition table) per board shape and process, shared
+# by choose_move and the pool workers so the table stays warm across calls.
+_SEARCHERS = {}
+
+
+def engine_kind(kind="auto"):
+    """Resolves "auto" to the engine it stands for (alpha-beta, on every board), see ENGINE_KINDS."""
+    if kind == "auto":
+        return "alphabeta"
+    if kind not in ENGINE_KINDS:
+        raise ValueError(f"unknown engine {kind!r}, expected one of {ENGINE_KINDS}")
+    return kind
+
+
+def make_searcher(geom, kind="auto", workers=0, patterns=False):
+    """
+    New search engine for the board `geom`. `kind` is one of ENGINE_KINDS.
+    patterns=True adds the pattern database to the leaf evaluation of
+    alpha-beta (opt-in, see dab_patterndb).
+    """
+    if engine_kind(kind) == "mcts":
+        import dab_mcts
+        return dab_mcts.MCTSSearcher(geom)
+    # solved databases exist for square boards only; with one, no leaf is ever evaluated
+    db = load_solved_db(geom.rows, geom.total_edges) if geom.rows == geom.cols else None
+    return Searcher(geom, workers=workers, db=db,
+                    patterns=load_pattern_db(geom) if patterns and db is None else None)
+
+
+def searcher_for(geom, kind="alphabeta"):
+    """Returns this process's shared engine of a given kind for the board `geom`."""
+    kind = engine_kind(kind)
+    searcher = _SEARCHERS.get((geom.rows, geom.cols, kind))
+    if searcher is None:
+        searcher = _SEARCHERS[(geom.rows, geom.cols, kind)] = make_searcher(geom, kind)
+    return searcher
+
+
+def choose_move(state, budget=AI_MOVE_BUDGET, player=AI, workers=0, kind="auto"):
+    """
+    Picks a move for `player` in `state` (a BoardState, which knows its
+    board), searching for at most `budget` seconds with the engine `kind`.
+    Returns (move, value): value is the final box margin `player` can expect,
+    counting the boxes both sides already own. move is None on a full board.
+    """
+    geom = state.geom
+    if state.edges & ~geom.full_mask:
+        raise ValueError(f"edge mask does not fit a {geom.name} board")
+    kind = engine_kind(kind)
+    searcher = searcher_for(geom, kind)
+    deadline = time.perf_counter() + budget
+    if kind == "alphabeta":
+        # per call: the searcher is shared, its own workers setting stays as it is
+        score, move = searcher.search_state(state, player, deadline, workers=workers)
+    else:
+        score, move = searcher.search_state(state, player, deadline)
+    return move, (score if player == AI else -score)
+
+
+# ===== worker thread untuk GUI/server =====
+class SearchJob:
+    """
+    One search queued on an EngineWorker. cancel() stops it at the searcher's
+    next time check, or before it starts if it is still queued. `tag` is
+    whatever the caller uses to recognise stale results (e.g. a game id).
+    With `on_update` set the job is an analysis (see Searcher.analyse) that
+    reports on_update(job, depth, values) as it deepens.
+    """
+
+    def __init__(self, searcher, state, player, deadline, on_done, tag, on_update=None):
+        self.searcher = searcher
+        self.state = state
+        self.player = player
+        self.deadline = deadline
+        self.on_done = on_done
+        self.tag = tag
+        self.on_update = on_update
+        self.stop = threading.Event()
+        self.submitted = time.perf_counter()
+        # (score_from_AI_pov, best_move), or the exception the search raised
+        self.result = None
+        self.error = None
+        # the searcher's SearchStats, and seconds from submit() to the result
+        self.stats = None
+        self.latency = None
+
+    def cancel(self):
+        self.stop.set()
+
+    @property
+    def cancelled(self):
+        return self.stop.is_set()
+
+
+class EngineWorker:
+    """
+    A single long-lived thread that runs SearchJobs one at a time, so searches
+    never overlap and abandoned ones do not keep running. `on_done(job)` is
+    called on the worker thread when a job finishes without being cancelled.
+    With `stats_log` set, every search appends its statistics to that file
+    as one JSON line.
+    """
+
+    def __init__(self, stats_log=STATS_LOG):
+        self.stats_log = stats_log
+        self._jobs = queue.Queue()
+        self._lock = threading.Lock()
+        self._active = set()
+        self._thread = threading.Thread(target=self._run, name="dab-engine", daemon=True)
+        self._thread.start()
+
+    def submit(self, searcher, edges, boxes, player, deadline=None, on_done=None, tag=None):
+        """Queues a search of the GUI's edge_state/box_owner lists, returns its SearchJob."""
+        return self._queue(SearchJob(searcher, BoardState.from_lists(searcher.geom, edges, boxes),
+                                     player, deadline, on_done, tag))
+
+    def submit_analysis(self, searcher, edges, boxes, player, on_update, deadline=None,
+                        on_done=None, tag=None):
+        """
+        Queues a multi-PV analysis of the GUI's lists; on_update(job, depth,
+        values) is called on the worker thread after every depth, until the
+        job is cancelled or the position is solved.
+        """
+        return self._queue(SearchJob(searcher, BoardState.from_lists(searcher.geom, edges, boxes),
+                                     player, deadline, on_done, tag, on_update))
+
+    def _queue(self, job):
+        with self._lock:
+            self._active.add(job)
+        self._jobs.put(job)
+        return job
+
+    def cancel_all(self):
+        """Cancels the running job and everything still queued."""
+        with self._lock:
+            for job in self._active:
+                job.cancel()
+
+    def close(self):
+        """Cancels all jobs and stops the thread."""
+        self.cancel_all()
+        self._jobs.put(None)
+        self._thread.join()
+
+    def _run(self):
+        while True:
+            job = self._jobs.get()
+            if job is None:
+                return
+            try:
+                if job.cancelled:
+                    continue
+                try:
+                    if job.on_update is not None:
+                        job.result = job.searcher.analyse(job.state, job.player, job.deadline,
+                                                          job.stop, self._updates(job))
+                    else:
+                        job.result = job.searcher.search_state(job.state, job.player,
+                                                               job.deadline, job.stop)
+                except Exception as err:
+                    job.error = err
+                job.stats = getattr(job.searcher, "stats", None)
+                job.latency = time.perf_counter() - job.submitted
+                if self.stats_log and job.stats is not None:
+                    self._log(job)
+                if not job.cancelled and job.on_done is not None:
+                    job.on_done(job)
+            finally:
+                with self._lock:
+                    self._active.discard(job)
+
+    @staticmethod
+    def _updates(job):
+        def update(depth, values):
+            if not job.cancelled:
+                job.on_update(job, depth, values)
+        return update
+
+    def _log(self, job):
+        record = job.stats.as_dict()
+        record.update(time=round(time.time(), 3), player=job.player, tag=job.tag,
+                      latency=round(job.latency, 4), cancelled=job.cancelled,
+                      error=None if job.error is None else str(job.error))
+        try:
+            with open(self.stats_log, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record) + "\n")
+        except OSError:
+            # statistics must never break the game
+            pass
+
+
+# ===== process pool untuk pencarian paralel =====
+# The pool is created on first use and kept warm between moves; each worker
+# keeps its own Searcher per board shape and evaluation settings (see
+# _pool_searcher), searching with the parent's shared transposition table.
+# The pool, _SHARED_ALPHA and _SHARED_ABORT serve one split at a time: whoever
+# holds _SPLIT_LOCK, which is also the only caller allowed to (re)create them.
+_SPLIT_LOCK = threading.Lock()
+_POOL = None
+_POOL_WORKERS = 0
+_SHARED_ALPHA = None
+# bumped by the parent to stop every task submitted before it (see _PoolAbort)
+_SHARED_ABORT = None
+# (rows, cols) -> the parent's table this worker is attached to
+_ATTACHED_TABLES = {}
+# (rows, cols, leaf_eval, pattern file) -> this worker's Searcher for root moves
+_POOL_SEARCHERS = {}
+
+
+def _get_pool(workers):
+    """
+    Returns (pool, shared_alpha, shared_abort), (re)creating the pool if the
+    size changed. Call with _SPLIT_LOCK held, so no other split is using it.
+    """
+    global _POOL, _POOL_WORKERS, _SHARED_ALPHA, _SHARED_ABORT
+    if _POOL is None or _POOL_WORKERS != workers:
+        if _POOL is not None:
+            _POOL.shutdown(wait=False, cancel_futures=True)
+        # spawn, not fork: the pool is started from the AI thread of a Tk process
+        ctx = multiprocessing.get_context("spawn")
+        _SHARED_ALPHA = ctx.Value('i', -999)
+        _SHARED_ABORT = ctx.RawValue('i', 0)
+        _POOL = ProcessPoolExecutor(max_workers=workers, mp_context=ctx, initializer=_init_worker,
+                                    initargs=(_SHARED_ALPHA, _SHARED_ABORT))
+        _POOL_WORKERS = workers
+    return _POOL, _SHARED_ALPHA, _SHARED_ABORT
+
+
+def _init_worker(shared_alpha, shared_abort):
+    global _SHARED_ALPHA, _SHARED_ABORT
+    _SHARED_ALPHA = shared_alpha
+    _SHARED_ABORT = shared_abort
+
+
+class _PoolAbort:
+    """
+    Stop flag of a pool task: set once the parent moves the abort counter
+    on, or once the shared alpha rises above the bound the task started with.
+    """
+
+    def __init__(self, generation, alpha):
+        self.generation = generation
+        self.alpha = alpha
+
+    def aborted(self):
+        return _SHARED_ABORT.value != self.generation
+
+    def is_set(self):
+        return self.aborted() or _SHARED_ALPHA.value > self.alpha
+
+
+def attached_table(geom, name):
+    """
+    The table another process share()d as `name` for the board `geom`,
+    attached once per worker process (engine pool or dab_server).
+    """
+    table = _ATTACHED_TABLES.get((geom.rows, geom.cols))
+    if table is None or table.name != name:
+        if table is not None:
+            # the parent started a new table (another game), drop the old one
+            table.close()
+        table = _ATTACHED_TABLES[(geom.rows, geom.cols)] = TranspositionTable.attach(geom, name)
+    return table
+
+
+def _pool_searcher(geom, leaf_eval, patterns):
+    """This worker's Searcher with the parent's settings; `patterns` is a pattern file path."""
+    key = (geom.rows, geom.cols, leaf_eval, patterns)
+    searcher = _POOL_SEARCHERS.get(key)
+    if searcher is None:
+        pattern_db = None
+        if patterns is not None:
+            pattern_db = load_pattern_db(geom)
+            if pattern_db is None or pattern_db.path != patterns:
+                pattern_db = PatternDB(geom, patterns)
+        # a tiny private table, replaced by the parent's shared one for every task
+        searcher = _POOL_SEARCHERS[key] = Searcher(geom, tt=TranspositionTable(geom, 2),
+                                                   leaf_eval=leaf_eval, patterns=pattern_db)
+    return searcher
+
+
+def _search_root_move(geom, edges, move, depth, seconds, generation, tt_name,
+                      leaf_eval=True, patterns=None):
+    """
+    Pool task: (value of root move `move` for the side to move, or None if
+    the time ran out or the search was aborted first; SearchStats of the
+    task). Runs with alpha taken from the shared bound, on the parent's
+    transposition table `tt_name` and with its evaluation settings. When
+    the shared alpha rises meanwhile, the move is searched again on the
+    narrower window; the table keeps what the first attempt found.
+    """
+    searcher = _pool_searcher(geom, leaf_eval, patterns)
+    searcher.tt = attached_table(geom, tt_name)
+    searcher._deadline = None if seconds is None else time.perf_counter() + seconds
+    stats = searcher.stats = SearchStats(geom)
+    hashes = searcher.tt.hashes(edges)
+    try:
+        while True:
+            alpha = _SHARED_ALPHA.value
+            stop = searcher._stop = _PoolAbort(generation, alpha)
+            # ownership does not affect the value, so the player id is arbitrary;
+            # a fresh state every attempt, since an interrupted one is left half made
+            try:
+                return searcher._child_value(BoardState(geom, edges), AI, move, depth,
+                                             alpha, 999, hashes), stats
+            except SearchTimeout:
+                if stop.aborted() or (searcher._deadline is not None
+                                      and time.perf_counter() > searcher._deadline):
+                    return None, stats
+    finally:
+        searcher._deadline = None
+        searcher._stop = None
+
+
+def _parse_indices(text, limit, what):
+    """Turns "0,3,7" into a bitmask, rejecting indices outside 0..limit-1."""
+    mask = 0
+    for part in filter(None, (p.strip() for p in text.split(","))):
+        i = int(part)
+        if not 0 <= i < limit:
+            raise ValueError(f"{what} index {i} is out of range 0..{limit - 1}")
+        mask |= 1 << i
+    return mask
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Print the AI's move and its value for a Dots and Boxes position.")
+    parser.add_argument("--size", default=str(GRID_SIZE),
+                        help="dots per side (3 = Easy, 4 = Hard), or ROWSxCOLS")
+    parser.add_argument("--edges", default="", help="comma-separated indices of drawn edges")
+    parser.add_argument("--human-boxes", default="", help="comma-separated box indices owned by the human")
+    parser.add_argument("--ai-boxes", default="", help="comma-separated box indices owned by the AI")
+    parser.add_argument("--player", choices=("ai", "human"), default="ai", help="side to move")
+    parser.add_argument("--budget", type=float, default=AI_MOVE_BUDGET, help="search time in seconds")
+    parser.add_argument("--workers", type=int, default=0, help="processes for the root split")
+    parser.add_argument("--engine", choices=ENGINE_KINDS, default="auto",
+                        help="search engine (auto = alphabeta)")
+    parser.add_argument("--stats", action="store_true", help="also print the search statistics as JSON")
+    parser.add_argument("--analyse", action="store_true",
+                        help="print the value of every empty edge instead of only the best move")
+    args = parser.parse_args(argv)
+
+    try:
+        geom = parse_geometry(args.size)
+        state = BoardState(geom, _parse_indices(args.edges, geom.total_edges, "edge"),
+                           _parse_indices(args.human_boxes, len(geom.boxes), "box"),
+                           _parse_indices(args.ai_boxes, len(geom.boxes), "box"))
+    except ValueError as err:
+        parser.error(str(err))
+    player = AI if args.player == "ai" else HUMAN
+    try:
+        if args.analyse:
+            depth, values = searcher_for(geom, args.engine).analyse(
+                state, player, time.perf_counter() + args.budget)
+        else:
+            move, value = choose_move(state, args.budget, player, args.workers, args.engine)
+    except ImportError as err:
+        parser.error(str(err))
+    if args.analyse:
+        print(f"depth {depth}")
+        for m, v in sorted(values.items(), key=lambda mv: (-mv[1], mv[0])):
+            print(f"edge {m} {v:+d}")
+    else:
+        print(f"move {move if move is not None else '-'}")
+        print(f"value {value:+d}")
+    if args.stats:
+        print(f"stats {json.dumps(searcher_for(geom, args.engine).stats.as_dict())}")
+    return 0
+
+
+if __name__ == "__main__":
+    # run main from the importable module, so that modules importing
+    # dab_engine (dab_mcts) share its classes and geometry cache with the CLI
+    import dab_engine
+    sys.exit(dab_engine.main())
@@ -0,0 +1,288 @@
+"""
+Monte Carlo Tree Search engine, experimental: for boards too large for
+alpha-beta, but so far weaker than it on every size tried (0.2 s per move
+on 5x5: alpha-beta wins every game by about 10 boxes, whatever the batch
+size or exploration constant). The engine only plays it when asked to.
+
+The tree is PUCT over BoardState edge masks. Each leaf is scored by
+a batch of playouts that run side by side as NumPy array operations: one
+row per board, and the box/edge incidence matrix built from the board
+Geometry's boxes turns "how many sides does every box have" into a single
+matrix product. The playout policy takes a box when it can, otherwise
+prefers moves that do not hand one over, and otherwise plays at random.
+
+MCTSSearcher has the same search()/search_state()/analyse() interface as
+dab_engine.Searcher, so the GUI and choose_move can use either.
+NumPy is required; available() reports whether it is installed.
+"""
+import math
+import time
+
+try:
+    import numpy as np
+except ImportError:  # the alpha-beta engine still works without NumPy
+    np = None
+
+import dab_endgame
+from dab_engine import AI, HUMAN, BoardState, SearchStats
+
+# Playouts per leaf, and the PUCT exploration constant (values are scaled to -1..1).
+# Batches of 64 or 256 give 2-3x the playouts per second of 16 but a shallower
+# tree, and play no better against alpha-beta.
+MCTS_BATCH = 16
+MCTS_EXPLORATION = 1.0
+# Analysis: seconds of search between two reports of the root move values
+ANALYSIS_SLICE = 0.25
+
+_TABLES = {}
+
+
+def available():
+    return np is not None
+
+
+def _tables(geom):
+    """Edge x box incidence matrix of a board, cached per shape."""
+    key = (geom.rows, geom.cols)
+    if key not in _TABLES:
+        incidence = np.zeros((geom.total_edges, len(geom.boxes)), dtype=np.float32)
+        for bi, sides in enumerate(geom.boxes):
+            for e in sides:
+                incidence[e, bi] = 1.0
+        _TABLES[key] = incidence
+    return _TABLES[key]
+
+
+def rollout_batch(geom, edges, count, rng):
+    """
+    Plays `count` random games to the end from the edge mask `edges`, all at
+    once. Returns an array of final margins, over the boxes still open at the
+    start, from the point of view of the player to move at `edges`.
+    """
+    incidence = _tables(geom)
+    total = geom.total_edges
+    drawn = np.array([(edges >> e) & 1 for e in range(total)], dtype=np.float32)
+    boards = np.tile(drawn, (count, 1))
+    rows = np.arange(count)
+    sides = boards @ incidence
+    done = sides == 4
+    margin = np.zeros(count, dtype=np.int32)
+    sign = np.ones(count, dtype=np.int32)   # +1 while the starting player is on move
+
+    for _ in range(total - int(drawn.sum())):
+        empty = boards == 0
+        # edges that would complete a box, and edges that would give one away
+        capture = ((sides == 3).astype(np.float32) @ incidence.T) > 0
+        unsafe = ((sides == 2).astype(np.float32) @ incidence.T) > 0
+        priority = rng.random((count, total), dtype=np.float32)
+        priority += 4.0 * capture + 2.0 * ~unsafe
+        priority[~empty] = -1.0
+        moves = priority.argmax(axis=1)
+        boards[rows, moves] = 1.0
+        sides += incidence[moves]
+        completed = (sides == 4) & ~done
+        done |= completed
+        gained = completed.sum(axis=1)
+        margin += sign * gained
+        # no box completed -> the other player moves next
+        sign = np.where(gained > 0, sign, -sign)
+    return margin
+
+
+# Prior weights of the three move classes used by the tree policy
+PRIOR_CAPTURE, PRIOR_SAFE, PRIOR_SACRIFICE = 4.0, 2.0, 0.25
+
+
+class _Node:
+    __slots__ = ("move", "prior", "children", "visits", "total", "same_mover")
+
+    def __init__(self, move, prior, same_mover):
+        self.move = move
+        self.prior = prior
+        # None until the node is expanded
+        self.children = None
+        self.visits = 0
+        # summed margins from the point of view of the player who made `move`
+        self.total = 0.0
+        # True when `move` completed a box, so its maker is also on move here
+        self.same_mover = same_mover
+
+
+class MCTSSearcher:
+    """
+    PUCT search with batched NumPy playouts on the board `geom`; see the
+    module docstring. The prior of a move comes from its class: captures
+    first, then safe moves, then moves that hand the opponent a box.
+    """
+
+    def __init__(self, geom, batch=MCTS_BATCH, exploration=MCTS_EXPLORATION, seed=None):
+        if np is None:
+            raise ImportError("the MCTS engine needs NumPy (pip install numpy)")
+        self.geom = geom
+        self.batch = batch
+        self.exploration = exploration
+        self._rng = np.random.default_rng(seed)
+        self.playouts = 0
+        self.stats = SearchStats(geom, "mcts")
+        # (edges, root node) of the last search, reused when the game continues from it
+        self._tree = None
+
+    def reset(self):
+        """Drops the tree kept from the last search (new game)."""
+        self._tree = None
+
+    def search(self, edges, boxes, player, deadline=None, stop=None):
+        """MCTS on the GUI's edge_state/box_owner lists, see search_state."""
+        return self.search_state(BoardState.from_lists(self.geom, edges, boxes),
+                                 player, deadline, stop)
+
+    def search_state(self, state, player, deadline=None, stop=None):
+        """
+        Runs PUCT until `deadline` (a time.perf_counter() value) passes or the
+        threading.Event `stop` is set. Returns (estimated score_from_AI_pov,
+        most visited move). If the position follows from the last one
+        searched (e.g. pondered during the opponent's turn), the matching
+        subtree is kept and searched further.
+        """
+        if deadline is None and stop is None:
+            raise ValueError("MCTS needs a deadline or a stop event")
+        geom = self.geom
+        stats = self.stats = SearchStats(geom, "mcts")
+        start = time.perf_counter()
+        banked = state.score()
+        sign = 1 if player == AI else -1
+        solved = dab_endgame.solve(state.edges, geom.box_masks, geom.edge_boxes)
+        if solved is not None:
+            return banked + sign * solved[0], solved[1]
+        if state.is_full():
+            return banked, None
+
+        root = self._subtree(state.edges) or _Node(None, 1.0, False)
+        if not root.children:
+            root.children = self._expand(state.edges)
+        self._tree = (state.edges, root)
+        # values are scaled by the boxes still open, so they stay within -1..1
+        scale = max(1, len(geom.boxes) - state.owned[HUMAN].bit_count()
+                    - state.owned[AI].bit_count())
+        self.playouts = 0
+        while True:
+            self._iterate(root, state.edges, scale)
+            if deadline is not None and time.perf_counter() >= deadline:
+                break
+            if stop is not None and stop.is_set():
+                stats.stopped = True
+                break
+        stats.playouts = self.playouts
+        stats.wall_time = time.perf_counter() - start
+        best = max(root.children, key=lambda n: n.visits)
+        return banked + sign * round(best.total / max(1, best.visits)), best.move
+
+    def analyse(self, state, player, deadline=None, stop=None, on_update=None, max_depth=None):
+        """
+        Analysis in the form of dab_engine.Searcher.analyse: the search runs
+        in ANALYSIS_SLICE slices on the kept tree, and after each one
+        on_update(depth, values) gets the mean final margin for `player` of
+        every root move visited so far. `max_depth` is ignored. Returns
+        (depth, values) of the last report.
+        """
+        banked = state.score() if player == AI else -state.score()
+        done, values = 0, {}
+        while True:
+            end = time.perf_counter() + ANALYSIS_SLICE
+            if deadline is not None:
+                end = min(end, deadline)
+            score, move = self.search_state(state, player, end, stop)
+            if self._tree is None or self._tree[0] != state.edges:
+                # solved without a tree (endgame or full board): only the best move is known
+                values = {} if move is None else {move: score if player == AI else -score}
+                if on_update is not None:
+                    on_update(done, dict(values))
+                return done, values
+            values = {ch.move: banked + round(ch.total / ch.visits)
+                      for ch in self._tree[1].children if ch.visits}
+            done = self.stats.depth
+            if on_update is not None:
+                on_update(done, dict(values))
+            if (stop is not None and stop.is_set()) or (
+                    deadline is not None and time.perf_counter() >= deadline):
+                return done, values
+
+    def _subtree(self, edges):
+        """
+        Node of the kept tree for `edges`, found by following the moves
+        played since the last search, or None if the tree does not lead there.
+        """
+        if self._tree is None:
+            return None
+        node_edges, node = self._tree
+        if node_edges & ~edges:
+            return None
+        while node_edges != edges:
+            played = [ch for ch in (node.children or ()) if edges >> ch.move & 1]
+            if not played:
+                return None
+            node = max(played, key=lambda ch: ch.visits)
+            node_edges |= 1 << node.move
+        return node
+
+    def _expand(self, edges):
+        """Children of a position, one per empty edge, with their priors."""
+        captures, safe, sacrifices = BoardState(self.geom, edges).move_classes()
+        children = [_Node(e, PRIOR_CAPTURE, True) for e in captures]
+        children += [_Node(e, PRIOR_SAFE, False) for e in safe]
+        children += [_Node(e, PRIOR_SACRIFICE, False) for e in sacrifices]
+        total = sum(ch.prior for ch in children)
+        for ch in children:
+            ch.prior /= total
+        return children
+
+    def _iterate(self, root, edges, scale):
+        """One selection / expansion / batched playout / backup pass."""
+        node = root
+        path = []        # (node, boxes its move completed)
+        c = self.exploration
+        # selection: follow PUCT down to a node that is not expanded yet
+        while node.children:
+            sqrt_n = math.sqrt(node.visits + 1)
+            node = max(node.children, key=lambda ch: (
+                (ch.total / (ch.visits * scale) if ch.visits else 0.0)
+                + c * ch.prior * sqrt_n / (1 + ch.visits)))
+            edges, gained = self._play(edges, node.move)
+            path.append((node, gained))
+        stats = self.stats
+        stats.nodes += 1
+        stats.depth = max(stats.depth, len(path))
+
+        # simulation: margins for the player to move at the leaf. Chain/loop
+        # endgames have an exact value, which beats any number of playouts.
+        geom = self.geom
+        solved = dab_endgame.solve(edges, geom.box_masks, geom.edge_boxes)
+        if edges == geom.full_mask:
+            results = np.zeros(self.batch, dtype=np.int32)
+        elif solved is not None:
+            results = np.full(self.batch, solved[0], dtype=np.int32)
+        else:
+            results = rollout_batch(geom, edges, self.batch, self._rng)
+            node.children = self._expand(edges)
+            stats.expanded += 1
+            stats.children += len(node.children)
+        self.playouts += len(results)
+
+        # backup: walk up, adding captured boxes and flipping sides as needed.
+        # `value` is the summed margin for the player to move below `node`.
+        value = float(results.sum())
+        count = len(results)
+        for child, gained in reversed(path):
+            # value for the player who made child.move
+            value = value + gained * count if child.same_mover else -value
+            child.visits += count
+            child.total += value
+        root.visits += count
+
+    def _play(self, edges, move):
+        edges |= 1 << move
+        gained = 0
+        for _, mask in self.geom.edge_boxes[move]:
+            if edges & mask == mask:
+                gained += 1
+        return edges, gained
@@ -0,0 +1,367 @@
+"""
+Pattern database: a correction to the leaf evaluation, solved offline
+for small windows of the board and memory-mapped at run time.
+
+A window is a patch of 2x2 boxes (3x3 dots, 12 edges); a 4x4 board has
+four, an 8x8 board 36. generate() solves one window exhaustively as a
+game of its own, for every way its 12 edges can be drawn and every
+boundary state:
+
+- each of its 8 outer edges is "hot" when the box on the other side, out
+  of the window, already has two sides. Drawing a hot edge hands that box
+  to the opponent, who takes it and moves again. Edges on the border of
+  the board are never hot.
+- the parity of the safe moves on the whole board. The safe moves
+  outside the window act as one spare move (or none) that either side
+  may play instead of a window edge.
+
+The table stores the exact value of every window position; it does not
+depend on the board size. At a depth cutoff late in the game (at most
+PATTERN_MAX_SAFE safe moves left), dab_engine.evaluate() looks up every
+window on the position after its quiescence captures. It adds how much
+the windows' exact values differ, on average, from the share of their
+open boxes that its parity estimate already credits to the mover. Earlier
+in the game the window values say little about the whole board, so
+nothing is added.
+
+The table is opt-in: dab_engine.make_searcher(..., patterns=True), or
+alphabeta:pattern=1 in dab_selfplay. Its gain in self-play is small and
+not consistent across board sizes, so the engine plays without it by
+default.
+
+File layout: a 16-byte header (MAGIC, window edges, hot bits), then
+2 x 256 x 4096 signed bytes (net boxes for the mover), indexed by
+parity << 20 | hot << 12 | window edges.
+
+Checked against the full solved database, this cuts the mean squared
+error of the leaf evaluation by about 12% on 3x4 and 1% on 4x4.
+
+Generating and --check need NumPy; reading the file does not.
+
+    python dab_patterndb.py
+    python dab_patterndb.py --check 4 3x4
+"""
+import argparse
+import mmap
+import os
+import random
+import struct
+import sys
+import time
+
+from dab_solvedb import SOLVED_DB_DIR, solve_all
+
+MAGIC = b"DABPAT2\0"
+HEADER = struct.Struct("<8sBB6x")
+WINDOW_EDGES = 12
+# window edges (in a 3x3 board's own numbering) that are shared with the
+# boxes around the window: top row, bottom row, left and right column
+OUTER_EDGES = (0, 1, 4, 5, 6, 8, 9, 11)
+HOT_BITS = len(OUTER_EDGES)
+TABLE_SIZE = 2 << (WINDOW_EDGES + HOT_BITS)
+# Koreksi pola hanya dipakai jika sisa langkah aman paling banyak segini
+PATTERN_MAX_SAFE = 2
+# Posisi acak untuk --check (perbandingan dengan database posisi lengkap)
+CHECK_SAMPLES = 100_000
+
+_OPEN_DBS = {}
+
+
+def db_path():
+    return os.path.join(SOLVED_DB_DIR, "pattern_2x2.bin")
+
+
+def windows(geom):
+    """
+    Edge indices of every 2x2-box window, top-left first. Each window lists
+    its 12 edges in the order of a 3x3 board's own edge numbering.
+    """
+    out = []
+    for r in range(geom.rows - 2):
+        for c in range(geom.cols - 2):
+            edges = [(r + dr) * (geom.cols - 1) + c + dc for dr in range(3) for dc in range(2)]
+            edges += [geom.num_h_edges + (r + dr) * geom.cols + c + dc
+                      for dr in range(2) for dc in range(3)]
+            out.append(edges)
+    return out
+
+
+def outside_boxes(geom):
+    """
+    Per window, the box across each of its OUTER_EDGES, or None where the
+    edge lies on the border of the board.
+    """
+    out = []
+    for edges in windows(geom):
+        inside = {bi for bi, box in enumerate(geom.boxes) if set(box) <= set(edges)}
+        across = []
+        for j in OUTER_EDGES:
+            others = [bi for bi, _ in geom.edge_boxes[edges[j]] if bi not in inside]
+            across.append(others[0] if others else None)
+        out.append(across)
+    return out
+
+
+def solve_window():
+    """
+    Exhaustive solve of the window game, see the module docstring. Returns
+    (values, safe): values[spare, hot, edges] is the net number of boxes the
+    mover wins with `spare` (0 or 1) moves left outside the window, and
+    safe[hot, edges] the window's safe moves as evaluate() counts them.
+    """
+    import numpy as np
+
+    import dab_engine
+
+    edge_boxes = dab_engine.geometry(3).edge_boxes
+    n = 1 << WINDOW_EDGES
+    masks = np.arange(n, dtype=np.int32)
+    hot_edges = np.zeros(1 << HOT_BITS, dtype=np.int32)
+    for h in range(1 << HOT_BITS):
+        for i, j in enumerate(OUTER_EDGES):
+            if h >> i & 1:
+                hot_edges[h] |= 1 << j
+    drawn = np.zeros(n, dtype=np.int32)
+    for e in range(WINDOW_EDGES):
+        drawn += (masks >> e) & 1
+
+    values = np.zeros((2, 1 << HOT_BITS, n), dtype=np.int16)
+    for spare in (0, 1):
+        table = values[spare]
+        for level in range(WINDOW_EDGES, -1, -1):
+            idx = masks[drawn == level]
+            best = np.full((1 << HOT_BITS, len(idx)), -999, dtype=np.int16)
+            for e in range(WINDOW_EDGES):
+                free = np.nonzero((idx >> e & 1) == 0)[0]
+                child = idx[free] | (1 << e)
+                gained = np.zeros(len(free), dtype=np.int16)
+                for _, box_mask in edge_boxes[e]:
+                    gained += (child & box_mask) == box_mask
+                hot = (hot_edges >> e & 1).astype(np.int16)[:, None]
+                child_val = table[:, child]
+                # a hot edge gives the box across it away, unless the move
+                # also completes a window box: then the mover takes it as well
+                val = np.where(gained > 0, gained + hot + child_val, -(hot + child_val))
+                best[:, free] = np.maximum(best[:, free], val)
+            if spare:
+                # the spare move hands the turn over without touching the window
+                best = np.maximum(best, -values[0][:, idx])
+            table[:, idx] = np.where(best == -999, 0, best)
+
+    # safe moves the way leaf_features counts them: greedily, in edge order
+    sides = np.zeros((1 << HOT_BITS, n, 4), dtype=np.int8)
+    for bi, (top, bottom, left, right) in enumerate(dab_engine.geometry(3).boxes):
+        for e in (top, bottom, left, right):
+            sides[:, :, bi] += ((masks >> e) & 1).astype(np.int8)
+    safe = np.zeros((1 << HOT_BITS, n), dtype=np.int16)
+    for e in range(WINDOW_EDGES):
+        around = [bi for bi, _ in edge_boxes[e]]
+        ok = ((masks >> e & 1) == 0)[None, :] & ((hot_edges >> e & 1) == 0)[:, None]
+        for bi in around:
+            ok &= sides[:, :, bi] < 2
+        safe += ok
+        for bi in around:
+            sides[:, :, bi] += ok
+    return values, safe
+
+
+def generate(path=None):
+    """Solves the window game and writes the pattern file. Returns the path."""
+    import numpy as np
+
+    import dab_engine
+
+    path = path or db_path()
+    values, safe = solve_window()
+    masks = np.arange(1 << WINDOW_EDGES)
+    box_sides = [sum((masks >> e) & 1 for e in box) for box in dab_engine.geometry(3).boxes]
+    # positions with a three-sided box never reach a lookup (quiescence takes it)
+    capturable = sum((s == 3).astype(np.int16) for s in box_sides) > 0
+
+    table = np.zeros((2, 1 << HOT_BITS, 1 << WINDOW_EDGES), dtype=np.int16)
+    for parity in (0, 1):
+        # the board's safe moves outside the window: their parity is a spare move or none
+        spare = (parity - safe) & 1
+        table[parity] = np.where(capturable[None, :], 0,
+                                 np.where(spare == 1, values[1], values[0]))
+    data = table.astype(np.int8)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(HEADER.pack(MAGIC, WINDOW_EDGES, HOT_BITS))
+        f.write(data.tobytes())
+    os.replace(tmp, path)
+    return path
+
+
+class PatternDB:
+    """Read-only, memory-mapped pattern table, as seen from one board; see lookup()."""
+
+    def __init__(self, geom, path):
+        from dab_engine import control_estimate, geometry
+
+        self.path = path
+        self._control = control_estimate
+        layout = windows(geom)
+        if not layout:
+            raise ValueError(f"a {geom.name} board has no 2x2-box window")
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, window_edges, hot_bits = HEADER.unpack_from(self._map, 0)
+        if (magic != MAGIC or (window_edges, hot_bits) != (WINDOW_EDGES, HOT_BITS)
+                or len(self._map) != HEADER.size + TABLE_SIZE):
+            self._map.close()
+            raise ValueError(f"{path} is not a pattern database")
+        self._values = memoryview(self._map)[HEADER.size:].cast("b")
+        self.windows = len(layout)
+        # open (not yet completed) boxes of every window pattern
+        self._open = [sum(1 for mask in geometry(3).box_masks if pattern & mask != mask)
+                      for pattern in range(1 << WINDOW_EDGES)]
+        # byte tables that gather every window's 12 edges at once (the pattern
+        # of window w ends up in bits 12w..12w+11), and its hot bits from the
+        # mask of two-sided boxes (bits 8w..8w+7)
+        self._gather = _byte_tables(geom.total_edges, [
+            [(w * WINDOW_EDGES + j, e) for j, e in enumerate(edges)]
+            for w, edges in enumerate(layout)])
+        self._gather_hot = _byte_tables(len(geom.boxes), [
+            [(w * HOT_BITS + i, bi) for i, bi in enumerate(across) if bi is not None]
+            for w, across in enumerate(outside_boxes(geom))])
+
+    def lookup(self, edges, safe, twos):
+        """
+        Correction in whole boxes for the edges after the captures, the
+        safe-move count and the mask of two-sided boxes (see leaf_features).
+        """
+        if safe > PATTERN_MAX_SAFE:
+            return 0
+        packed = 0
+        for table in self._gather:
+            packed |= table[edges & 255]
+            edges >>= 8
+        hot = 0
+        for table in self._gather_hot:
+            hot |= table[twos & 255]
+            twos >>= 8
+        values = self._values
+        offset = (safe & 1) << (WINDOW_EDGES + HOT_BITS)
+        opened = self._open
+        total = open_boxes = 0
+        for _ in range(self.windows):
+            pattern = packed & 4095
+            total += values[offset | (hot & 255) << WINDOW_EDGES | pattern]
+            open_boxes += opened[pattern]
+            packed >>= WINDOW_EDGES
+            hot >>= HOT_BITS
+        # minus what evaluate() already credits to the windows' boxes, averaged
+        return round((total - self._control(open_boxes, safe)) / self.windows)
+
+    def close(self):
+        self._values.release()
+        self._map.close()
+
+
+def _byte_tables(bits, layout):
+    """
+    Tables that move bit `source` of a mask to bit `target` for every
+    (target, source) pair in `layout`, one table per byte of the mask.
+    """
+    pairs = [pair for group in layout for pair in group]
+    tables = []
+    for shift in range(0, bits, 8):
+        table = []
+        for byte in range(256):
+            packed = 0
+            for target, source in pairs:
+                if shift <= source < shift + 8 and byte >> (source - shift) & 1:
+                    packed |= 1 << target
+            table.append(packed)
+        tables.append(table)
+    return tables
+
+
+def load_pattern_db(geom):
+    """
+    Returns the PatternDB for a board, or None if the file has not been
+    generated (or the board has no 2x2-box window). Opened files are shared.
+    """
+    key = (geom.rows, geom.cols)
+    if key not in _OPEN_DBS:
+        db = None
+        path = db_path()
+        if os.path.exists(path) and windows(geom):
+            try:
+                db = PatternDB(geom, path)
+            except (OSError, ValueError):
+                db = None
+        _OPEN_DBS[key] = db
+    return _OPEN_DBS[key]
+
+
+def _sample(geom, count, rng):
+    """
+    `count` edge masks from random games: captures first, then safe moves,
+    each move played at random half of the time, so that the positions
+    look like those a search reaches rather than arbitrary edge sets.
+    """
+    from dab_engine import BoardState
+
+    masks = []
+    while len(masks) < count:
+        edges = 0
+        while edges != geom.full_mask and len(masks) < count:
+            masks.append(edges)
+            state = BoardState(geom, edges)
+            moves = state.empty_edges()
+            if rng.random() < 0.5:
+                moves = next(c for c in state.move_classes() if c)
+            edges |= 1 << rng.choice(moves)
+    return masks
+
+
+def check(geom, samples=CHECK_SAMPLES, seed=0):
+    """
+    Mean squared error of evaluate() against the exact values of sampled
+    positions, without and with the pattern table. The board needs a full
+    retrograde solve (dab_solvedb.solve_all), so at most 24 edges.
+    """
+    import numpy as np
+
+    import dab_engine
+
+    db = load_pattern_db(geom)
+    if db is None:
+        raise ValueError(f"no pattern table for {geom.name} (run python dab_patterndb.py)")
+    values, _ = solve_all(geom.total_edges, geom.edge_boxes)
+    masks = _sample(geom, samples, random.Random(seed))
+    exact = values[np.array(masks, dtype=np.int64)].astype(np.float64)
+    del values
+    before = np.array([dab_engine.evaluate(geom, m) for m in masks], dtype=np.float64)
+    after = np.array([dab_engine.evaluate(geom, m, db) for m in masks], dtype=np.float64)
+    return float(np.mean((exact - before) ** 2)), float(np.mean((exact - after) ** 2))
+
+
+def main(argv=None):
+    import dab_engine
+
+    parser = argparse.ArgumentParser(
+        description="Solve the 2x2-box window game and write the pattern table.")
+    parser.add_argument("--check", nargs="+", metavar="SIZE",
+                        help="instead, compare the leaf error with and without the table "
+                             "on these boards (at most 24 edges)")
+    args = parser.parse_args(argv)
+    if args.check:
+        for size in args.check:
+            geom = dab_engine.parse_geometry(size)
+            start = time.perf_counter()
+            before, after = check(geom)
+            print(f"{geom.name}: leaf error {before:.2f} -> {after:.2f} "
+                  f"({time.perf_counter() - start:.1f}s)")
+        return 0
+    start = time.perf_counter()
+    path = generate()
+    print(f"{TABLE_SIZE} window positions -> {path} ({time.perf_counter() - start:.1f}s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,51 +1,61 @@
 import tkinter as tk
-from functools import lru_cache
-import threading
+import math
+import time
+
+import dab_engine as engine
+import dab_mcts
+from dab_engine import HUMAN, AI, AI_MOVE_BUDGET, AI_WORKERS
 
 # Variabel global yang digunakan
-HUMAN, AI = 1, 2
 EDGE_EMPTY = "gray"
 HUMAN_COLOR = "green"
 AI_COLOR = "red"
+BOX_EMPTY = "#dddddd"
+# Warna analisis untuk garis kosong, dari langkah terbaik sampai yang
+# kehilangan ANALYSIS_SPREAD kotak atau lebih
+ANALYSIS_COLORS = ("#1e5eff", "#7fb2ff", "#f2c230", "#b35ad6")
+# Jarak maksimum (piksel) klik dari sebuah garis agar dianggap mengenai garis itu
+CLICK_TOLERANCE = 10
 
-# Variabel global yang digunakan untuk menyimpan nilai awal dari struktur petak/papan
-GRID_SIZE = 4
-NUM_H_EDGES = NUM_V_EDGES = TOTAL_EDGES = 0
-
-def configure_grid(size: int):
-    """
-    Rebuilds all grid-dependent globals for a given size.
-    Called at startup and whenever the user picks a new mode.
-    """
-    global GRID_SIZE, NUM_H_EDGES, NUM_V_EDGES, TOTAL_EDGES, BOXES
-    GRID_SIZE = size
-    NUM_H_EDGES = GRID_SIZE * (GRID_SIZE - 1)              
-    NUM_V_EDGES = (GRID_SIZE - 1) * GRID_SIZE              
-    TOTAL_EDGES = NUM_H_EDGES + NUM_V_EDGES
-
-    # Membuat default atau semacam container untuk menggabungkan edges dengan dots sehingga membentuk kotak
-    BOXES = []
-    for r in range(GRID_SIZE - 1):
-        for c in range(GRID_SIZE - 1):
-            top = r * (GRID_SIZE - 1) + c
-            bottom = (r + 1) * (GRID_SIZE - 1) + c
-            left = NUM_H_EDGES + r * GRID_SIZE + c
-            right = NUM_H_EDGES + r * GRID_SIZE + (c + 1)
-            BOXES.append((top, bottom, left, right))
+# Dengan timer aktif, AI memakai paling banyak AI_CLOCK_SHARE dari sisa waktu,
+# dibagi rata ke perkiraan sisa langkahnya (minimal AI_MIN_BUDGET detik).
+AI_MIN_BUDGET = 0.05
+AI_CLOCK_SHARE = 0.5
 
-
-# Inisialisasi bentuk grid awal
-configure_grid(GRID_SIZE)
+# Ukuran kanvas (piksel); jarak antar titik mengecil untuk papan besar
+CANVAS_SIZE = 500
+MAX_SPACING = 130
 
 
 class DotsAndBoxes:
-    def __init__(self, root, on_back=None, timer_seconds=None):
+    def __init__(self, root, on_back=None, timer_seconds=None, ai_budget=AI_MOVE_BUDGET,
+                 workers=AI_WORKERS, engine_kind="auto", ponder=False, worker=None,
+                 debug=False, geom=None, analysis=False):
         self.root = root
+        # board shape (dab_engine.Geometry); the game never reads module globals
+        self.geom = geom if geom is not None else engine.geometry(engine.GRID_SIZE)
         self.on_back = on_back
-        self.root.title(f"Dots and Boxes {GRID_SIZE}x{GRID_SIZE} (Human vs AI)")
+        self.ai_budget = ai_budget
+        self.workers = workers
+        self.engine_kind = engine_kind
+        # ponder: keep searching on the human's turn so the AI's reply is ready sooner
+        self.ponder = ponder
+        # analysis: on the human's turn the engine rates every empty edge
+        # (dab_engine.Searcher.analyse) and the edges are colored by it
+        self.analysis = analysis
+        # edge index -> analysis color currently shown on that empty edge
+        self._heat = {}
+        # all searches run on one engine thread (shared by the launcher's games);
+        # results carry the generation they were started in, which every
+        # New Game / Back to Menu / time-up moves on
+        self.worker = worker if worker is not None else engine.EngineWorker()
+        self._generation = 0
+        self._ai_job = None
+        self._ponder_job = None
+        self.root.title(f"Dots and Boxes {self.geom.name} (Human vs AI)")
 
         # Tampilan GUI atau dots and boxes nya
-        self.canvas = tk.Canvas(root, width=500, height=500, bg="white")
+        self.canvas = tk.Canvas(root, width=CANVAS_SIZE, height=CANVAS_SIZE, bg="white")
         self.canvas.pack()
 
         # header: centered info with timer below
@@ -70,6 +80,15 @@ class DotsAndBoxes:
         # put the timer below the centered info
         self.timer_label = tk.Label(self.status_frame, text=timer_text, font=(None, 14, "bold"))
         self.timer_label.pack(side=tk.TOP, anchor=tk.CENTER, pady=(2, 0))
+        # debug: statistics of the last AI search under the timer
+        self.debug_label = None
+        if debug:
+            self.debug_label = tk.Label(self.status_frame, text="", font=(None, 9), fg="#666666")
+            self.debug_label.pack(side=tk.TOP, anchor=tk.CENTER)
+        self.analysis_label = None
+        if analysis:
+            self.analysis_label = tk.Label(self.status_frame, text="", font=(None, 9), fg="#1e5eff")
+            self.analysis_label.pack(side=tk.TOP, anchor=tk.CENTER)
 
         self.controls = tk.Frame(root)
         self.controls.pack(pady=6)
@@ -77,35 +96,55 @@ class DotsAndBoxes:
         tk.Button(self.controls, text="Back to Menu", command=self._on_back).pack(side=tk.LEFT, padx=6)
 
         # Ukuran atau tampilan spasi pada GUI
-        self.spacing = 130
         self.margin = 60
+        self._layout()
 
         # Status awal game atau initial state
-        self.edge_state = [0] * TOTAL_EDGES
-        self.box_owner = [0] * ((GRID_SIZE - 1) * (GRID_SIZE - 1))
+        self.edge_state = [0] * self.geom.total_edges
+        self.box_owner = [0] * len(self.geom.boxes)
         self.current_player = HUMAN
+        # search engine (alpha-beta or MCTS); alpha-beta keeps its
+        # transposition table across moves of one game
+        self.searcher = engine.make_searcher(self.geom, engine_kind, workers)
+
+        # canvas item ids per box and per edge, created by the first draw_board,
+        # and the Geometry they were drawn for
+        self.box_items = None
+        self.edge_items = None
+        self._items_geom = None
 
         # draw and bind
         self.draw_board()
         # bind clicks after board created
         self.canvas.bind("<Button-1>", self.handle_click)
+        if self.analysis:
+            self._start_ponder()
 
     # ===== Menggambar =====
+    def _layout(self):
+        """Dot spacing: MAX_SPACING, shrunk only for boards that would not fit the canvas."""
+        longest = max(self.geom.rows, self.geom.cols) - 1
+        if self.margin + longest * MAX_SPACING < CANVAS_SIZE:
+            self.spacing = MAX_SPACING
+        else:
+            self.spacing = (CANVAS_SIZE - 2 * self.margin) // longest
+
     def get_edge_coords(self):
         """Returns (horizontal_edges, vertical_edges) lists of line coords."""
         h_edges, v_edges = [], []
+        rows, cols = self.geom.rows, self.geom.cols
 
         # Koordinat Garis horizontal
-        for r in range(GRID_SIZE):
+        for r in range(rows):
             y = self.margin + r * self.spacing
-            for c in range(GRID_SIZE - 1):
+            for c in range(cols - 1):
                 x1 = self.margin + c * self.spacing
                 x2 = x1 + self.spacing
                 h_edges.append((x1, y, x2, y))
 
         # Koordinat Garis vertikal
-        for r in range(GRID_SIZE - 1):
-            for c in range(GRID_SIZE):
+        for r in range(rows - 1):
+            for c in range(cols):
                 x = self.margin + c * self.spacing
                 y1 = self.margin + r * self.spacing
                 y2 = y1 + self.spacing
@@ -113,62 +152,108 @@ class DotsAndBoxes:
 
         return h_edges, v_edges
 
-    def draw_board(self):
-        if not getattr(self, '_alive', True):
-            return
+    def _edge_color(self, idx):
+        owner = self.edge_state[idx]
+        if owner == 0:
+            return self._heat.get(idx, EDGE_EMPTY)
+        return HUMAN_COLOR if owner == HUMAN else AI_COLOR
+
+    def _box_color(self, bi):
+        owner = self.box_owner[bi]
+        return BOX_EMPTY if owner == 0 else (HUMAN_COLOR if owner == HUMAN else AI_COLOR)
+
+    def _create_board_items(self):
+        """Creates every canvas item once and remembers its id per box and edge."""
         self.canvas.delete("all")
+        self._items_geom = self.geom
         h_edges, v_edges = self.get_edge_coords()
 
         # Menggambar kotak atau boxes
-        for i, owner in enumerate(self.box_owner):
-            br, bc = divmod(i, GRID_SIZE - 1)
+        self.box_items = []
+        for i in range(len(self.box_owner)):
+            br, bc = divmod(i, self.geom.cols - 1)
             x = self.margin + bc * self.spacing
             y = self.margin + br * self.spacing
-            color = "#dddddd"
-            if owner == HUMAN:
-                color = HUMAN_COLOR
-            elif owner == AI:
-                color = AI_COLOR
-            self.canvas.create_rectangle(
+            color = self._box_color(i)
+            self.box_items.append(self.canvas.create_rectangle(
                 x + 10, y + 10,
                 x + self.spacing - 10, y + self.spacing - 10,
                 fill=color, outline=color
-            )
-
-        # Menggambar garis atau edges
-        for i, (x1, y1, x2, y2) in enumerate(h_edges):
-            owner = self.edge_state[i]
-            color = EDGE_EMPTY if owner == 0 else (HUMAN_COLOR if owner == HUMAN else AI_COLOR)
-            self.canvas.create_line(x1, y1, x2, y2, fill=color, width=5)
+            ))
 
-        for j, (x1, y1, x2, y2) in enumerate(v_edges):
-            idx = NUM_H_EDGES + j
-            owner = self.edge_state[idx]
-            color = EDGE_EMPTY if owner == 0 else (HUMAN_COLOR if owner == HUMAN else AI_COLOR)
-            self.canvas.create_line(x1, y1, x2, y2, fill=color, width=5)
+        # Menggambar garis atau edges (horizontal dulu, sesuai urutan indeks)
+        self.edge_items = []
+        for i, (x1, y1, x2, y2) in enumerate(h_edges + v_edges):
+            self.edge_items.append(
+                self.canvas.create_line(x1, y1, x2, y2, fill=self._edge_color(i), width=5))
 
         # Menggambar titik atau dots
-        for r in range(GRID_SIZE):
-            for c in range(GRID_SIZE):
+        for r in range(self.geom.rows):
+            for c in range(self.geom.cols):
                 x = self.margin + c * self.spacing
                 y = self.margin + r * self.spacing
                 self.canvas.create_oval(x - 5, y - 5, x + 5, y + 5, fill="black")
 
+    def draw_board(self):
+        """
+        Brings the whole canvas in line with edge_state/box_owner. Items are
+        created on the first call (and after a change of board shape) only;
+        later calls just recolor them.
+        """
+        if not getattr(self, '_alive', True):
+            return
+        if self._items_geom is not self.geom:
+            self._create_board_items()
+            return
+        for i, item in enumerate(self.edge_items):
+            self.canvas.itemconfig(item, fill=self._edge_color(i))
+        for i, item in enumerate(self.box_items):
+            color = self._box_color(i)
+            self.canvas.itemconfig(item, fill=color, outline=color)
+
+    def draw_move(self, edge_idx):
+        """Recolors only the edge just played and the boxes next to it."""
+        if not getattr(self, '_alive', True):
+            return
+        self.canvas.itemconfig(self.edge_items[edge_idx], fill=self._edge_color(edge_idx))
+        for bi, _ in self.geom.edge_boxes[edge_idx]:
+            color = self._box_color(bi)
+            self.canvas.itemconfig(self.box_items[bi], fill=color, outline=color)
+
     def edge_at(self, x, y):
-        """Returns edge index near given point or None."""
-        h_edges, v_edges = self.get_edge_coords()
+        """
+        Returns edge index near given point or None. Computed from margin and
+        spacing instead of scanning every edge; when two edges are in reach,
+        horizontal edges and lower indices win, as before.
+        """
+        rows, cols = self.geom.rows, self.geom.cols
+        sp, m, tol = self.spacing, self.margin, CLICK_TOLERANCE
 
         # Mengecek input user pada garis secara horizontal
-        for i, (x1, y1, x2, y2) in enumerate(h_edges):
-            if abs(y - y1) <= 10 and x1 - 10 <= x <= x2 + 10:
-                return i
+        r = round((y - m) / sp)
+        if 0 <= r < rows and abs(y - (m + r * sp)) <= tol:
+            c = self._first_segment(x - m, cols - 1)
+            if c is not None:
+                return r * (cols - 1) + c
 
         # Mengecek input user pada garis secara vertikal
-        for j, (x1, y1, x2, y2) in enumerate(v_edges):
-            idx = NUM_H_EDGES + j
-            if abs(x - x1) <= 10 and y1 - 10 <= y <= y2 + 10:
-                return idx
+        c = round((x - m) / sp)
+        if 0 <= c < cols and abs(x - (m + c * sp)) <= tol:
+            r = self._first_segment(y - m, rows - 1)
+            if r is not None:
+                return self.geom.num_h_edges + r * cols + c
+
+        return None
 
+    def _first_segment(self, offset, count):
+        """
+        Lowest k in 0..count-1 whose segment [k*spacing, (k+1)*spacing],
+        widened by CLICK_TOLERANCE, contains `offset`, or None.
+        """
+        sp, tol = self.spacing, CLICK_TOLERANCE
+        k = max(0, math.ceil((offset - tol) / sp) - 1)
+        if k < count and k * sp - tol <= offset:
+            return k
         return None
 
     # ===== game logic =====
@@ -184,8 +269,11 @@ class DotsAndBoxes:
         if idx is None or self.edge_state[idx] != 0:
             return
 
+        # the searcher is needed for the reply; what it pondered stays in its table/tree
+        self._stop_ponder()
+        self._clear_analysis()
         gained = self.apply_move(idx, HUMAN)
-        self.draw_board()
+        self.draw_move(idx)
         self.update_info()
 
         if not gained and not self.is_game_over():
@@ -194,15 +282,18 @@ class DotsAndBoxes:
             self.root.after(80, self.ai_move)
         else:
             self.current_player = HUMAN
+            self._start_ponder()
 
     def apply_move(self, edge_idx, player):
         """
         Marks the edge, assigns any newly completed boxes,
         returns True if at least one box was completed.
+        Only the (at most two) boxes next to the edge can change.
         """
         self.edge_state[edge_idx] = player
         gained = False
-        for bi, (t, b, l, r) in enumerate(BOXES):
+        for bi, _ in self.geom.edge_boxes[edge_idx]:
+            t, b, l, r = self.geom.boxes[bi]
             if (self.edge_state[t] and self.edge_state[b] and
                 self.edge_state[l] and self.edge_state[r] and
                 self.box_owner[bi] == 0):
@@ -215,27 +306,126 @@ class DotsAndBoxes:
 
     # ===== AI =====
     def ai_move(self):
-        """Run minimax in a background thread, then apply the chosen move."""
+        """Queue a search on the engine thread, then apply the chosen move."""
         if not getattr(self, '_alive', True) or self.is_game_over() or self.time_up:
             self.update_info()
             return
+        # a move scheduled before New Game must not play in the new one
+        if self.current_player != AI:
+            return
 
         self.info.config(text="AI thinking...")
+        self._stop_ponder()
 
-        edges = tuple(self.edge_state)
-        boxes = tuple(self.box_owner)
-        depth_limit = None if GRID_SIZE <= 3 else 3       # small boards -> full search
+        deadline = time.perf_counter() + self._move_budget()
+        self._ai_job = self.worker.submit(self.searcher, self.edge_state, self.box_owner, AI,
+                                          deadline, on_done=self._ai_done, tag=self._generation)
 
-        def worker(e, b):
-            try:
-                _, move = self.minimax(e, b, AI, depth_limit)
-            except Exception as err:
-                self.root.after(0, lambda: self.info.config(text=f"AI error: {err}"))
-                return
-            # schedule apply only if still alive
-            self.root.after(0, lambda: self._apply_ai_move(move) if getattr(self, '_alive', True) else None)
+    def _ai_done(self, job):
+        """Engine thread: hand the finished search over to the Tk thread."""
+        try:
+            self.root.after(0, lambda: self._deliver(job))
+        except Exception:
+            # the window is gone
+            pass
+
+    def _deliver(self, job):
+        # results of an abandoned game are dropped
+        if job.tag != self._generation or not getattr(self, '_alive', True):
+            return
+        self._ai_job = None
+        if self.debug_label is not None and job.stats is not None:
+            self.debug_label.config(text=f"{job.stats.summary()}  (latency {job.latency:.2f}s)")
+        if job.error is not None:
+            self.info.config(text=f"AI error: {job.error}")
+            return
+        self._apply_ai_move(job.result[1])
+
+    def _cancel_search(self):
+        """Stops every search of this game and ignores results still on the way."""
+        self._generation += 1
+        for job in (self._ai_job, self._ponder_job):
+            if job is not None:
+                job.cancel()
+        self._ai_job = self._ponder_job = None
 
-        threading.Thread(target=worker, args=(edges, boxes), daemon=True).start()
+    def _start_ponder(self):
+        """
+        Search the human's position on the engine thread until _stop_ponder.
+        With the analysis overlay on, that search is the analysis, which
+        fills the same tables as pondering.
+        """
+        if not (self.ponder or self.analysis) or not getattr(self, '_alive', True) \
+                or self.time_up or self.is_game_over():
+            return
+        self._stop_ponder()
+        if self.analysis:
+            self._ponder_job = self.worker.submit_analysis(
+                self.searcher, self.edge_state, self.box_owner, HUMAN,
+                on_update=self._analysis_update, tag=self._generation)
+        else:
+            self._ponder_job = self.worker.submit(self.searcher, self.edge_state, self.box_owner,
+                                                  HUMAN, tag=self._generation)
+
+    def _stop_ponder(self):
+        """Cancels the ponder search; the next job starts as soon as it returns."""
+        if self._ponder_job is not None:
+            self._ponder_job.cancel()
+            self._ponder_job = None
+
+    def _clear_analysis(self):
+        """Turns the analysis colors back to EDGE_EMPTY: they belong to the previous position."""
+        for idx in self._heat:
+            if not self.edge_state[idx]:
+                self.canvas.itemconfig(self.edge_items[idx], fill=EDGE_EMPTY)
+        self._heat = {}
+        if self.analysis_label is not None:
+            self.analysis_label.config(text="")
+
+    def _analysis_update(self, job, depth, values):
+        """Engine thread: pass a deeper analysis on to the Tk thread."""
+        try:
+            self.root.after(0, lambda: self._show_analysis(job, depth, values))
+        except Exception:
+            # the window is gone
+            pass
+
+    def _show_analysis(self, job, depth, values):
+        """
+        Colors every empty edge by how much worse than the best move it is.
+        Only edges whose color changes are touched, so each deeper result
+        costs a few itemconfig calls instead of a redraw.
+        """
+        if job is not self._ponder_job or not getattr(self, '_alive', True) or not values:
+            return
+        best = max(values.values())
+        for idx, owner in enumerate(self.edge_state):
+            if owner:
+                continue
+            if idx in values:
+                color = ANALYSIS_COLORS[min(best - values[idx], len(ANALYSIS_COLORS) - 1)]
+            else:
+                color = EDGE_EMPTY
+            if self._heat.get(idx, EDGE_EMPTY) != color:
+                self._heat[idx] = color
+                self.canvas.itemconfig(self.edge_items[idx], fill=color)
+        if self.analysis_label is not None:
+            self.analysis_label.config(text=f"Analysis depth {depth}: best move {best:+d} for you")
+
+    def _move_budget(self):
+        """
+        Seconds the AI may spend on this move: the configured budget, capped
+        by an even share of the remaining game clock when the timer is on.
+        """
+        budget = self.ai_budget
+        if getattr(self, 'timer_total', None) is not None and self.remaining is not None:
+            ai_moves_left = max(1, self.edge_state.count(0) // 2)
+            budget = min(budget, self.remaining * AI_CLOCK_SHARE / ai_moves_left)
+        return max(AI_MIN_BUDGET, budget)
+
+    def minimax(self, edges, boxes, player, depth=None):
+        """Fixed-depth search on this game's engine, see dab_engine.Searcher.minimax."""
+        return self.searcher.minimax(edges, boxes, player, depth)
 
     def _apply_ai_move(self, move):
         if not getattr(self, '_alive', True):
@@ -251,7 +441,7 @@ class DotsAndBoxes:
             return
 
         gained = self.apply_move(move, AI)
-        self.draw_board()
+        self.draw_move(move)
         self.update_info()
 
         if gained and not self.is_game_over():
@@ -259,17 +449,26 @@ class DotsAndBoxes:
             self.root.after(80, self.ai_move)
         else:
             self.current_player = HUMAN
+            self._start_ponder()
+
+    def reset_game(self, geom=None):
+        """Reset current board, on a new board shape if `geom` is given."""
+        self._cancel_search()
+        if geom is not None and geom is not self.geom:
+            # another board: new layout and a matching engine
+            self.geom = geom
+            self._layout()
+            self.searcher = engine.make_searcher(geom, self.engine_kind, self.workers)
+            self.root.title(f"Dots and Boxes {geom.name} (Human vs AI)")
+        else:
+            self.searcher.reset()
 
-    def reset_game(self):
-        """Reset current board with same grid size."""
-        try:
-            DotsAndBoxes.minimax.cache_clear()
-        except Exception:
-            pass
-
-        self.edge_state = [0] * TOTAL_EDGES
-        self.box_owner = [0] * ((GRID_SIZE - 1) * (GRID_SIZE - 1))
+        self.edge_state = [0] * self.geom.total_edges
+        self.box_owner = [0] * len(self.geom.boxes)
         self.current_player = HUMAN
+        self._heat = {}
+        if self.analysis_label is not None:
+            self.analysis_label.config(text="")
         # reset timer: cancel any pending tick and restart if timer configured
         self.time_up = False
         if getattr(self, '_timer_id', None) is not None:
@@ -289,6 +488,8 @@ class DotsAndBoxes:
 
         self.draw_board()
         self.update_info()
+        if self.analysis:
+            self._start_ponder()
 
     def _on_back(self):
         """Destroy widgets and go back to launcher."""
@@ -297,6 +498,7 @@ class DotsAndBoxes:
             self._alive = False
         except Exception:
             pass
+        self._cancel_search()
         # destroy primary UI widgets (if present)
         for w in (getattr(self, 'canvas', None), getattr(self, 'info', None),
                   getattr(self, 'controls', None), getattr(self, 'timer_label', None),
@@ -407,62 +609,11 @@ class DotsAndBoxes:
                 pass
             self._timer_id = None
         self.time_up = True
-        # redraw and update info to reflect final state
-        self.draw_board()
+        self._cancel_search()
+        # no more moves to analyse; otherwise the board is unchanged, only the status line
+        self._clear_analysis()
         self.update_info()
 
-    # ===== minimax =====
-    @lru_cache(maxsize=None)
-    def minimax(self, edges, boxes, player, depth=None):
-        """
-        Minimax with optional depth limit.
-        Returns (score_from_AI_pov, best_move).
-        """
-        # terminal
-        if all(e != 0 for e in edges):
-            ai_score = sum(1 for b in boxes if b == AI)
-            human_score = sum(1 for b in boxes if b == HUMAN)
-            return ai_score - human_score, None
-
-        # depth cutoff -> heuristic: difference in boxes
-        if depth is not None and depth <= 0:
-            ai_score = sum(1 for b in boxes if b == AI)
-            human_score = sum(1 for b in boxes if b == HUMAN)
-            return ai_score - human_score, None
-
-        moves = [i for i, e in enumerate(edges) if e == 0]
-
-        if player == AI:
-            best_val, best_move = -999, None
-            for m in moves:
-                val = self._simulate_move(edges, boxes, m, AI, depth)
-                if val[0] > best_val:
-                    best_val, best_move = val[0], m
-            return best_val, best_move
-        else:
-            best_val, best_move = 999, None
-            for m in moves:
-                val = self._simulate_move(edges, boxes, m, HUMAN, depth)
-                if val[0] < best_val:
-                    best_val, best_move = val[0], m
-            return best_val, best_move
-
-    def _simulate_move(self, edges, boxes, move, player, depth):
-        """Helper for minimax: apply move on copies and recurse."""
-        e2 = list(edges)
-        b2 = list(boxes)
-        e2[move] = player
-
-        gained = False
-        for bi, (t, b, l, r) in enumerate(BOXES):
-            if e2[t] and e2[b] and e2[l] and e2[r] and b2[bi] == 0:
-                b2[bi] = player
-                gained = True
-
-        next_player = player if gained else (AI if player == HUMAN else HUMAN)
-        next_depth = None if depth is None else depth - 1
-        return self.minimax(tuple(e2), tuple(b2), next_player, next_depth)
-
 
 def main():
     root = tk.Tk()
@@ -481,24 +632,35 @@ def main():
     tk.Entry(frame_timer, width=5, textvariable=seconds_var).pack(side=tk.LEFT)
     tk.Label(frame_timer, text="sec").pack(side=tk.LEFT, padx=(4, 0))
     frame_timer.pack(pady=(0, 10))
+    # AI keeps thinking during the player's turn
+    ponder_var = tk.BooleanVar(value=False)
+    # one engine thread for every game started from this window
+    worker = engine.EngineWorker()
+    tk.Checkbutton(launcher, text="AI thinks on your turn", variable=ponder_var).pack()
+    # statistik pencarian AI di bawah timer
+    debug_var = tk.BooleanVar(value=False)
+    tk.Checkbutton(launcher, text="Show search stats", variable=debug_var).pack()
+    # mesin MCTS (butuh numpy) hanya jika dipilih; default-nya alpha-beta
+    mcts_var = tk.BooleanVar(value=False)
+    if dab_mcts.available():
+        tk.Checkbutton(launcher, text="Use MCTS engine (experimental, weaker)", variable=mcts_var).pack()
+    # warna analisis AI pada setiap garis kosong
+    analysis_var = tk.BooleanVar(value=False)
+    tk.Checkbutton(launcher, text="Show move analysis", variable=analysis_var).pack(pady=(0, 10))
 
     def show_launcher():
         launcher.pack(padx=60, pady=60)
         root.title("Dots and Boxes")
 
-    def start_game(size):
-        configure_grid(size)
-        try:
-            DotsAndBoxes.minimax.cache_clear()
-        except Exception:
-            pass
+    def start_game(size, cols=None):
+        geom = engine.geometry(size, cols)
 
         # Jika sudah ada game yang aktif yang masih hidup, cukup reset tanpa kembali ke menu
         prev = getattr(root, 'current_game', None)
         if prev is not None:
             # if the previous game is still alive, reset it and reuse
             if getattr(prev, '_alive', False):
-                prev.reset_game()
+                prev.reset_game(geom)
                 return
             else:
                 # previous instance is torn down; clear reference and continue
@@ -512,8 +674,8 @@ def main():
             launcher.pack_forget()
         except Exception:
             pass
-        root.title(f"Dots and Boxes {GRID_SIZE}x{GRID_SIZE}")
-        
+        root.title(f"Dots and Boxes {geom.name}")
+
         # Timer parsing
         tval = None
         raw_min = minutes_var.get().strip()
@@ -529,7 +691,11 @@ def main():
         except Exception:
             tval = None
 
-        root.current_game = DotsAndBoxes(root, on_back=show_launcher, timer_seconds=tval)
+        root.current_game = DotsAndBoxes(root, on_back=show_launcher, timer_seconds=tval,
+                                         ponder=ponder_var.get(), worker=worker,
+                                         debug=debug_var.get(), geom=geom,
+                                         analysis=analysis_var.get(),
+                                         engine_kind="mcts" if mcts_var.get() else "auto")
         try:
             root.update_idletasks()
             root.current_game.canvas.lift()
@@ -543,6 +709,18 @@ def main():
 
     tk.Button(launcher, text="Easy (3x3)", width=20, command=lambda: start_game(3)).pack(pady=5)
     tk.Button(launcher, text="Hard (4x4)", width=20, command=lambda: start_game(4)).pack(pady=5)
+    # papan besar
+    frame_large = tk.Frame(launcher)
+    for size in range(5, 9):
+        tk.Button(frame_large, text=f"{size}x{size}", width=4,
+                  command=lambda size=size: start_game(size)).pack(side=tk.LEFT, padx=2)
+    frame_large.pack(pady=5)
+    # papan persegi panjang (baris x kolom titik)
+    frame_rect = tk.Frame(launcher)
+    for rows, cols in ((3, 4), (4, 5)):
+        tk.Button(frame_rect, text=f"{rows}x{cols}", width=4,
+                  command=lambda rows=rows, cols=cols: start_game(rows, cols)).pack(side=tk.LEFT, padx=2)
+    frame_rect.pack(pady=5)
     tk.Button(launcher, text="Quit", width=20, command=root.destroy).pack(pady=(12, 0))
 
     root.mainloop()
@@ -0,0 +1,269 @@
+"""
+Self-play tournament runner: AI against AI, without the GUI.
+
+Every pair of engine configurations plays `--games` games on each board
+size, taking turns at moving first. Games run in a pool of worker
+processes; each finished game is written as one JSON line as soon as it
+comes in, and the win rates, average margins, move times and throughput
+are printed at the end (on stderr, so the JSON lines can be piped).
+
+An engine configuration is `kind[:option=value...]`:
+
+    alphabeta:budget=0.1          iterative deepening for 0.1 s per move
+    alphabeta:depth=4:db=0        fixed 4-ply search, without the solved database
+    alphabeta:depth=4:eval=0      cutoffs scored 0 instead of the leaf evaluation
+    alphabeta:depth=4:pattern=1   leaf evaluation with the pattern database
+    mcts:budget=0.2:batch=32      Monte Carlo tree search
+    greedy                        takes boxes, avoids giving them away, else random
+    random                        any empty edge
+
+    python dab_selfplay.py --size 3 4 3x5 --games 200 alphabeta:budget=0.05 greedy
+"""
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import json
+import multiprocessing
+import os
+import random
+import sys
+import time
+
+import dab_engine as engine
+from dab_engine import AI, HUMAN, BoardState
+from dab_patterndb import load_pattern_db
+from dab_solvedb import load_solved_db
+
+ENGINE_KINDS = ("alphabeta", "mcts", "greedy", "random")
+# option -> type, per configuration string
+ENGINE_OPTIONS = {"budget": float, "depth": int, "db": int, "eval": int, "pattern": int,
+                  "batch": int, "exploration": float}
+# Waktu per langkah (detik) jika konfigurasi tidak memberi budget atau depth
+DEFAULT_BUDGET = 0.1
+
+
+def parse_spec(text):
+    """'alphabeta:budget=0.1' -> (text, kind, {option: value})."""
+    kind, *parts = text.split(":")
+    if kind not in ENGINE_KINDS:
+        raise ValueError(f"unknown engine {kind!r}, expected one of {ENGINE_KINDS}")
+    options = {}
+    for part in parts:
+        name, sep, value = part.partition("=")
+        if not sep or name not in ENGINE_OPTIONS:
+            raise ValueError(f"bad option {part!r} in {text!r}, expected one of "
+                             f"{', '.join(f'{k}=...' for k in ENGINE_OPTIONS)}")
+        options[name] = ENGINE_OPTIONS[name](value)
+    return text, kind, options
+
+
+def make_player(spec, geom, seed):
+    """Returns pick(state, player) -> move for an engine configuration on the board `geom`."""
+    _, kind, options = spec
+    rng = random.Random(seed)
+    budget = options.get("budget")
+    if budget is None and options.get("depth") is None:
+        budget = DEFAULT_BUDGET
+
+    def deadline():
+        return None if budget is None else time.perf_counter() + budget
+
+    if kind == "alphabeta":
+        db = None
+        if options.get("db", 1) and geom.rows == geom.cols:
+            db = load_solved_db(geom.rows, geom.total_edges)
+        patterns = load_pattern_db(geom) if options.get("pattern", 0) and db is None else None
+        searcher = engine.Searcher(geom, db=db, leaf_eval=bool(options.get("eval", 1)),
+                                   patterns=patterns)
+        depth = options.get("depth")
+        return lambda state, player: searcher.search_state(
+            state, player, deadline(), max_depth=depth)[1]
+    if kind == "mcts":
+        import dab_mcts
+        searcher = dab_mcts.MCTSSearcher(geom, options.get("batch", dab_mcts.MCTS_BATCH),
+                                         options.get("exploration", dab_mcts.MCTS_EXPLORATION),
+                                         seed)
+        return lambda state, player: searcher.search_state(state, player, deadline())[1]
+    if kind == "greedy":
+        return lambda state, player: rng.choice(next(c for c in state.move_classes() if c))
+    return lambda state, player: rng.choice(state.empty_edges())
+
+
+def play_game(geom, first, second, seed, opening=0):
+    """
+    Plays one game on the board `geom`, `first` (a parse_spec result)
+    moving first. The first `opening` moves are random safe moves, so that
+    repeated games between deterministic engines differ. Returns the game
+    record as a dict.
+    """
+    rng = random.Random(seed)
+    # the first player takes the HUMAN id, the second the AI id
+    specs = {HUMAN: first, AI: second}
+    players = {HUMAN: make_player(first, geom, seed), AI: make_player(second, geom, seed + 1)}
+    think = {HUMAN: 0.0, AI: 0.0}
+    moves = {HUMAN: 0, AI: 0}
+    state = BoardState(geom)
+    player = HUMAN
+    start = time.perf_counter()
+    for _ in range(opening):
+        safe = state.move_classes()[1]
+        if not safe:
+            break
+        # a safe move never completes a box, so the turn always passes
+        state.make(rng.choice(safe), player)
+        player = AI if player == HUMAN else HUMAN
+
+    while not state.is_full():
+        t = time.perf_counter()
+        move = players[player](state, player)
+        think[player] += time.perf_counter() - t
+        moves[player] += 1
+        if move is None or state.edges >> move & 1:
+            raise RuntimeError(f"{specs[player][0]} played an illegal move {move!r}")
+        if not state.make(move, player):
+            player = AI if player == HUMAN else HUMAN
+
+    margin = -state.score()
+    return {
+        "size": geom.name,
+        "seed": seed,
+        "first": first[0],
+        "second": second[0],
+        "boxes": [state.owned[HUMAN].bit_count(), state.owned[AI].bit_count()],
+        "margin": margin,
+        "winner": first[0] if margin > 0 else second[0] if margin < 0 else None,
+        "moves": [moves[HUMAN], moves[AI]],
+        "think": [round(think[HUMAN], 4), round(think[AI], 4)],
+        "seconds": round(time.perf_counter() - start, 4),
+    }
+
+
+def schedule(geoms, specs, games, seed=0, opening=0):
+    """
+    Every game of the tournament as play_game arguments: all pairs of
+    configurations (a configuration given alone plays itself), `games`
+    games per pair and size, alternating the first mover.
+    """
+    pairs = [(a, b) for i, a in enumerate(specs) for b in specs[i + 1:]] or [(specs[0], specs[0])]
+    tasks = []
+    for geom in geoms:
+        for a, b in pairs:
+            for g in range(games):
+                first, second = (a, b) if g % 2 == 0 else (b, a)
+                tasks.append((geom, first, second, seed + len(tasks) * 2, opening))
+    return tasks
+
+
+class Tally:
+    """Aggregate results of one pair of configurations on one board size."""
+
+    def __init__(self, size, a, b):
+        self.size, self.a, self.b = size, a, b
+        self.games = self.draws = self.first_wins = 0
+        self.wins = {a: 0, b: 0}
+        self.margin = 0            # summed margin from a's point of view
+        self.think = {a: 0.0, b: 0.0}
+        self.moves = {a: 0, b: 0}
+
+    def add(self, rec):
+        first, second = rec["first"], rec["second"]
+        self.games += 1
+        if rec["winner"] is None:
+            self.draws += 1
+        else:
+            self.wins[rec["winner"]] += 1
+        if rec["margin"] > 0:
+            self.first_wins += 1
+        self.margin += rec["margin"] if first == self.a else -rec["margin"]
+        for name, think, moves in ((first, rec["think"][0], rec["moves"][0]),
+                                   (second, rec["think"][1], rec["moves"][1])):
+            self.think[name] += think
+            self.moves[name] += moves
+
+    def lines(self):
+        n = max(1, self.games)
+        head = f"{self.size}  {self.a}  vs  {self.b}  ({self.games} games)"
+        if self.a == self.b:
+            # a self-play mirror: report it from the first mover's side
+            return [head, f"    first mover wins {self.first_wins / n:.1%}  draws {self.draws / n:.1%}  "
+                          f"avg move time {self.think[self.a] / max(1, self.moves[self.a]):.4f}s"]
+        rows = [head]
+        for name in (self.a, self.b):
+            rows.append(f"    {name:<30} wins {self.wins[name] / n:6.1%}  avg move time "
+                        f"{self.think[name] / max(1, self.moves[name]):.4f}s")
+        rows.append(f"    draws {self.draws / n:.1%}  first mover wins {self.first_wins / n:.1%}  "
+                    f"avg margin for {self.a}: {self.margin / n:+.2f}")
+        return rows
+
+
+def run(tasks, processes, out):
+    """
+    Plays the tasks, writing each record to `out` as it finishes.
+    Returns (records, seconds).
+    """
+    start = time.perf_counter()
+    records = []
+
+    def emit(rec):
+        records.append(rec)
+        out.write(json.dumps(rec) + "\n")
+        out.flush()
+
+    if processes <= 0:
+        for task in tasks:
+            emit(play_game(*task))
+    else:
+        # spawn, like the engine's pool: no Tk or thread state is inherited
+        ctx = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=processes, mp_context=ctx) as pool:
+            for fut in as_completed([pool.submit(play_game, *task) for task in tasks]):
+                emit(fut.result())
+    return records, time.perf_counter() - start
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Play AI-vs-AI games between engine configurations and compare them.")
+    parser.add_argument("engines", nargs="+", metavar="ENGINE",
+                        help="configuration such as alphabeta:budget=0.1 (see module docstring)")
+    parser.add_argument("--size", nargs="+", default=[str(engine.GRID_SIZE)],
+                        help="board sizes in dots per side, or ROWSxCOLS")
+    parser.add_argument("--games", type=int, default=100, help="games per pair of engines and size")
+    parser.add_argument("--opening", type=int, default=2, help="random safe moves before the engines play")
+    parser.add_argument("--processes", type=int, default=os.cpu_count() or 1,
+                        help="worker processes (0 = play in this process)")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the first game")
+    parser.add_argument("--out", default="-", help="file for the per-game JSON lines (- = stdout)")
+    args = parser.parse_args(argv)
+
+    try:
+        specs = [parse_spec(text) for text in args.engines]
+        geoms = [engine.parse_geometry(size) for size in args.size]
+    except ValueError as err:
+        parser.error(str(err))
+    tasks = schedule(geoms, specs, args.games, args.seed, args.opening)
+
+    out = sys.stdout if args.out == "-" else open(args.out, "w", encoding="utf-8")
+    try:
+        records, seconds = run(tasks, args.processes, out)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+    tallies = {}
+    for rec in records:
+        a, b = sorted((rec["first"], rec["second"]), key=args.engines.index)
+        key = (rec["size"], a, b)
+        if key not in tallies:
+            tallies[key] = Tally(*key)
+        tallies[key].add(rec)
+    for key in sorted(tallies):
+        print("\n".join(tallies[key].lines()), file=sys.stderr)
+    moves = sum(sum(rec["moves"]) for rec in records)
+    print(f"{len(records)} games, {moves} moves in {seconds:.1f}s "
+          f"({len(records) / seconds:.2f} games/s, {moves / seconds:.0f} moves/s)",
+          file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
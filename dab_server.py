@@ -0,0 +1,420 @@
+"""
+asyncio game server: many Dots and Boxes games against the AI at once.
+
+Clients talk JSON lines over a local TCP or Unix socket, or over
+stdin/stdout with --stdio. Every request is one JSON object and gets one
+JSON object back, echoing its "id" if it had one:
+
+    {"op": "new", "size": 4, "budget": 0.5, "ai_first": false}   size may be "3x5"
+    {"op": "move", "session": "s1", "edge": 7}     human move, then the AI's reply
+    {"op": "ai", "session": "s1"}                   let the AI move (after ai_first)
+    {"op": "state", "session": "s1"}
+    {"op": "close", "session": "s1"}
+    {"op": "stats"}
+
+Searches run in a bounded process pool. Each worker keeps one engine per
+board size. The alpha-beta engines all use one transposition table per
+board size. The server creates that table in shared memory, so every
+session and every worker reads and adds to the same entries. At most
+`max_pending` searches are queued or running at once.
+Beyond that, requests wait for a slot, and a connection with too many
+unanswered requests is not read from until some are answered.
+
+Every AI move has a deadline of the session's budget plus DEADLINE_GRACE.
+The search gets whatever is left of its budget when a worker picks it up.
+If no result arrives in time, the server plays a quick fallback move
+(captures first, then safe moves), so replies stay within the deadline
+under load.
+
+    python dab_server.py --port 8765 --workers 3
+    python dab_server.py --stdio
+"""
+import argparse
+import asyncio
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import itertools
+import json
+import multiprocessing
+import sys
+import time
+
+import dab_engine as engine
+from dab_engine import AI, AI_MOVE_BUDGET, AI_WORKERS, ENGINE_KINDS, HUMAN, BoardState
+
+# Jumlah titik per sisi yang dilayani server (baris dan kolom)
+SERVER_SIZES = range(3, 9)
+# Anggaran waktu maksimum per langkah yang boleh diminta klien (detik)
+MAX_BUDGET = 5.0
+# Waktu tambahan di atas budget sebelum server memakai langkah cadangan (detik)
+DEADLINE_GRACE = 0.5
+# Sesi yang tidak dipakai selama ini (detik) dihapus
+SESSION_IDLE = 600
+MAX_SESSIONS = 1000
+# Permintaan yang belum dijawab per koneksi sebelum server berhenti membaca
+MAX_CONNECTION_PENDING = 32
+
+
+def _pool_move(geom, kind, edges, human_boxes, ai_boxes, player, deadline, tt_name=None):
+    """
+    Pool task: (move, score from the AI's point of view, search stats) for a
+    position, searching until the absolute time.time() `deadline`. With
+    `tt_name`, the alpha-beta engine searches with the server's shared
+    table of that name.
+    """
+    searcher = engine.searcher_for(geom, kind)
+    if tt_name is not None:
+        searcher.tt = engine.attached_table(geom, tt_name)
+    state = BoardState(geom, edges, human_boxes, ai_boxes)
+    seconds = max(0.0, deadline - time.time())
+    score, move = searcher.search_state(state, player, time.perf_counter() + seconds)
+    return move, score, searcher.stats.as_dict()
+
+
+class RequestError(Exception):
+    """A request the server refuses; its message goes back to the client."""
+
+
+class Session:
+    """One game: the board, whose turn it is and the AI's settings."""
+
+    def __init__(self, sid, geom, budget, kind):
+        self.sid = sid
+        self.geom = geom
+        self.budget = budget
+        self.kind = kind
+        self.state = BoardState(geom)
+        self.to_move = HUMAN
+        # one request at a time per session, so moves apply in order
+        self.lock = asyncio.Lock()
+        self.touched = time.monotonic()
+
+    def is_over(self):
+        return self.state.is_full()
+
+    def play(self, edge, player):
+        """Draws an edge for `player`; returns True if it completed a box."""
+        if not 0 <= edge < self.geom.total_edges or self.state.edges >> edge & 1:
+            raise RequestError(f"edge {edge} is not an empty edge of this board")
+        gained = bool(self.state.make(edge, player))
+        if not gained:
+            self.to_move = AI if player == HUMAN else HUMAN
+        return gained
+
+    def fallback_move(self):
+        """A capture if there is one, else a move that gives nothing away, else any."""
+        moves = self.state.ordered_moves()
+        return moves[0] if moves else None
+
+    def to_json(self):
+        state = self.state
+        edges = [e for e in range(self.geom.total_edges) if state.edges >> e & 1]
+        boxes = {name: [b for b in range(len(self.geom.boxes)) if state.owned[p] >> b & 1]
+                 for name, p in (("human", HUMAN), ("ai", AI))}
+        return {
+            "session": self.sid,
+            "size": self.geom.name,
+            "edges": edges,
+            "boxes": boxes,
+            "score": [len(boxes["human"]), len(boxes["ai"])],
+            "to_move": "human" if self.to_move == HUMAN else "ai",
+            "over": self.is_over(),
+        }
+
+
+class GameServer:
+    """Sessions, the search pool and the request handlers; see the module docstring."""
+
+    def __init__(self, workers=AI_WORKERS, max_pending=None, max_sessions=MAX_SESSIONS,
+                 budget=AI_MOVE_BUDGET):
+        self.workers = max(1, workers)
+        self.max_pending = max_pending or 2 * self.workers
+        self.max_sessions = max_sessions
+        self.budget = budget
+        # spawn, like the engine's own pool: workers start clean
+        self.pool = ProcessPoolExecutor(max_workers=self.workers,
+                                        mp_context=multiprocessing.get_context("spawn"))
+        # (rows, cols) -> shared TranspositionTable of the alpha-beta engines
+        self._tables = {}
+        self.sessions = {}
+        self._ids = itertools.count(1)
+        self._slots = asyncio.Semaphore(self.max_pending)
+        self.pending = 0
+        self.searches = 0
+        self.fallbacks = 0
+        self._latency = deque(maxlen=1000)
+
+    def close(self):
+        self.pool.shutdown(wait=False, cancel_futures=True)
+        for table in self._tables.values():
+            table.close()
+        self._tables.clear()
+
+    def _table_name(self, session):
+        """
+        Shared-memory name of the transposition table for the session's
+        board size, created on first use. Returns None for MCTS, which
+        does not use one.
+        """
+        geom = session.geom
+        if engine.engine_kind(session.kind) != "alphabeta":
+            return None
+        table = self._tables.get((geom.rows, geom.cols))
+        if table is None:
+            table = self._tables[(geom.rows, geom.cols)] = engine.TranspositionTable(geom)
+            table.share()
+        return table.name
+
+    # ===== requests =====
+    async def handle(self, request):
+        """Answers one request dict with a response dict."""
+        try:
+            if not isinstance(request, dict):
+                raise RequestError("a request must be a JSON object")
+            op = request.get("op")
+            handler = getattr(self, f"_op_{op}", None) if isinstance(op, str) else None
+            if handler is None:
+                raise RequestError(f"unknown op {op!r}")
+            response = await handler(request)
+            response["ok"] = True
+        except RequestError as err:
+            response = {"ok": False, "error": str(err)}
+        if isinstance(request, dict) and "id" in request:
+            response["id"] = request["id"]
+        return response
+
+    def _session(self, request):
+        session = self.sessions.get(request.get("session"))
+        if session is None:
+            raise RequestError(f"no session {request.get('session')!r}")
+        session.touched = time.monotonic()
+        return session
+
+    async def _op_new(self, request):
+        try:
+            geom = engine.parse_geometry(request.get("size", engine.GRID_SIZE))
+        except ValueError as err:
+            raise RequestError(str(err)) from None
+        if geom.rows not in SERVER_SIZES or geom.cols not in SERVER_SIZES:
+            raise RequestError(f"rows and columns must be in {SERVER_SIZES.start}..{SERVER_SIZES.stop - 1}")
+        budget = request.get("budget", self.budget)
+        if not isinstance(budget, (int, float)) or not 0 < budget <= MAX_BUDGET:
+            raise RequestError(f"budget must be a number of seconds in (0, {MAX_BUDGET}]")
+        kind = request.get("engine", "auto")
+        if kind not in ENGINE_KINDS:
+            raise RequestError(f"engine must be one of {ENGINE_KINDS}")
+        if len(self.sessions) >= self.max_sessions:
+            raise RequestError("too many sessions, try again later")
+        session = Session(f"s{next(self._ids)}", geom, float(budget), kind)
+        self.sessions[session.sid] = session
+        if request.get("ai_first"):
+            session.to_move = AI
+        return session.to_json()
+
+    async def _op_move(self, request):
+        session = self._session(request)
+        edge = request.get("edge")
+        if not isinstance(edge, int):
+            raise RequestError("move needs an integer edge")
+        async with session.lock:
+            if session.is_over():
+                raise RequestError("the game is over")
+            if session.to_move != HUMAN:
+                raise RequestError("it is the AI's turn")
+            session.play(edge, HUMAN)
+            ai_moves = await self._ai_turn(session)
+        return dict(session.to_json(), ai_moves=ai_moves)
+
+    async def _op_ai(self, request):
+        session = self._session(request)
+        async with session.lock:
+            ai_moves = await self._ai_turn(session)
+        return dict(session.to_json(), ai_moves=ai_moves)
+
+    async def _op_state(self, request):
+        return self._session(request).to_json()
+
+    async def _op_close(self, request):
+        session = self._session(request)
+        del self.sessions[session.sid]
+        return {"session": session.sid, "closed": True}
+
+    async def _op_stats(self, request):
+        latency = sorted(self._latency)
+
+        def pct(p):
+            return round(latency[min(len(latency) - 1, int(p * len(latency)))], 4) if latency else None
+
+        return {"sessions": len(self.sessions), "pending": self.pending,
+                "max_pending": self.max_pending, "workers": self.workers,
+                "searches": self.searches, "fallbacks": self.fallbacks,
+                "latency_p50": pct(0.5), "latency_p95": pct(0.95), "latency_max": pct(1.0)}
+
+    # ===== AI =====
+    async def _ai_turn(self, session):
+        """Plays AI moves until the human is on move again or the game ends."""
+        moves = []
+        while session.to_move == AI and not session.is_over():
+            move, info = await self._ai_move(session)
+            session.play(move, AI)
+            moves.append(dict(info, edge=move))
+        return moves
+
+    async def _ai_move(self, session):
+        """
+        (move, info) for the AI in a session, within the session's deadline.
+        Waits for a pool slot, then for the search; falls back to
+        Session.fallback_move when either takes too long.
+        """
+        start = time.monotonic()
+        timeout = session.budget + DEADLINE_GRACE
+        # the search may run until the end of the budget, counted from now
+        deadline = time.time() + session.budget
+        info = {}
+        move = None
+        try:
+            await asyncio.wait_for(self._slots.acquire(), timeout)
+        except asyncio.TimeoutError:
+            info["fallback"] = "busy"
+        else:
+            self.pending += 1
+            state = session.state
+            future = asyncio.get_running_loop().run_in_executor(
+                self.pool, _pool_move, session.geom, session.kind, state.edges,
+                state.owned[HUMAN], state.owned[AI], AI, deadline, self._table_name(session))
+            # the slot is freed when the search really ends, even after a fallback
+            future.add_done_callback(self._release_slot)
+            try:
+                move, score, stats = await asyncio.wait_for(
+                    asyncio.shield(future), max(0.0, timeout - (time.monotonic() - start)))
+                info.update(value=score, depth=stats["depth"], nodes=stats["nodes"])
+                self.searches += 1
+            except asyncio.TimeoutError:
+                info["fallback"] = "deadline"
+            except Exception as err:
+                info["fallback"] = f"error: {err}"
+        if move is None or session.state.edges >> move & 1:
+            move = session.fallback_move()
+            self.fallbacks += 1
+        elapsed = time.monotonic() - start
+        self._latency.append(elapsed)
+        info["seconds"] = round(elapsed, 4)
+        return move, info
+
+    def _release_slot(self, _future):
+        self.pending -= 1
+        self._slots.release()
+
+    async def expire_sessions(self):
+        """Background task: drops sessions idle for more than SESSION_IDLE seconds."""
+        while True:
+            await asyncio.sleep(min(60, SESSION_IDLE))
+            cutoff = time.monotonic() - SESSION_IDLE
+            for sid in [sid for sid, s in self.sessions.items() if s.touched < cutoff]:
+                del self.sessions[sid]
+
+    # ===== transport =====
+    async def _answer(self, line, write, limit):
+        try:
+            try:
+                request = json.loads(line)
+            except ValueError:
+                response = {"ok": False, "error": "invalid JSON"}
+            else:
+                response = await self.handle(request)
+            await write(json.dumps(response))
+        finally:
+            limit.release()
+
+    async def serve_lines(self, readline, write):
+        """
+        Reads requests with `readline` until it returns nothing and answers
+        each as a task of its own, so slow AI moves do not hold up others.
+        """
+        limit = asyncio.Semaphore(MAX_CONNECTION_PENDING)
+        tasks = set()
+        while True:
+            # backpressure: stop reading while too many requests are unanswered
+            await limit.acquire()
+            line = await readline()
+            if not line:
+                limit.release()
+                break
+            if not line.strip():
+                limit.release()
+                continue
+            task = asyncio.create_task(self._answer(line, write, limit))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def serve_connection(self, reader, writer):
+        lock = asyncio.Lock()
+
+        async def write(text):
+            async with lock:
+                writer.write(text.encode() + b"\n")
+                await writer.drain()
+
+        try:
+            await self.serve_lines(reader.readline, write)
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def serve_stdio(self):
+        def write_sync(text):
+            sys.stdout.write(text + "\n")
+            sys.stdout.flush()
+
+        async def write(text):
+            write_sync(text)
+
+        await self.serve_lines(lambda: asyncio.to_thread(sys.stdin.readline), write)
+
+
+async def _run(args):
+    server = GameServer(args.workers, args.max_pending, args.max_sessions, args.budget)
+    expiry = asyncio.create_task(server.expire_sessions())
+    try:
+        if args.stdio:
+            await server.serve_stdio()
+            return
+        if args.unix:
+            listener = await asyncio.start_unix_server(server.serve_connection, path=args.unix)
+            where = args.unix
+        else:
+            listener = await asyncio.start_server(server.serve_connection, args.host, args.port)
+            where = f"{args.host}:{args.port}"
+        print(f"dab_server listening on {where} ({server.workers} workers)", file=sys.stderr)
+        async with listener:
+            await listener.serve_forever()
+    finally:
+        expiry.cancel()
+        server.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve Dots and Boxes games against the AI.")
+    parser.add_argument("--stdio", action="store_true", help="talk JSON lines over stdin/stdout")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--unix", help="listen on this Unix socket path instead of TCP")
+    parser.add_argument("--workers", type=int, default=max(1, AI_WORKERS), help="search processes")
+    parser.add_argument("--max-pending", type=int, default=None,
+                        help="searches queued or running at once (default 2 per worker)")
+    parser.add_argument("--max-sessions", type=int, default=MAX_SESSIONS)
+    parser.add_argument("--budget", type=float, default=AI_MOVE_BUDGET,
+                        help="default search seconds per AI move")
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(_run(args))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
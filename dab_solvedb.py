@@ -0,0 +1,149 @@
+"""
+Solved-position database for small Dots and Boxes boards.
+
+Every set of drawn edges is a position, and its value (net boxes still to
+be won by the player to move) does not depend on who owns the boxes taken
+so far. A board with E edges therefore has only 2^E positions: 4096 for
+the 3x3 board and 16.7M for the 4x4 board. generate() solves all of them
+with one retrograde pass, from the full board back to the empty one, and
+writes the values and best moves to a binary file. SolvedDB memory-maps
+that file so the engine can play perfectly with one lookup per move.
+
+File layout: a 16-byte header (MAGIC, grid size, edge count), then one
+signed byte of value per edge mask, then one byte of best move per edge
+mask (NO_MOVE for the full board).
+
+Generating needs NumPy; reading the file does not.
+
+    python dab_solvedb.py 3 4
+"""
+import mmap
+import os
+import struct
+import sys
+import time
+
+MAGIC = b"DABDB1\0\0"
+HEADER = struct.Struct("<8sBB6x")
+NO_MOVE = 255
+
+SOLVED_DB_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "solved")
+
+_OPEN_DBS = {}
+
+
+def db_path(size):
+    return os.path.join(SOLVED_DB_DIR, f"dab_{size}x{size}.bin")
+
+
+def solve_all(total_edges, edge_boxes):
+    """
+    Retrograde solve of every edge mask. Returns (values, moves) NumPy
+    arrays indexed by edge mask. Positions are processed by decreasing
+    number of drawn edges, so every child is solved before its parent.
+    """
+    import numpy as np
+
+    n = 1 << total_edges
+    masks = np.arange(n, dtype=np.uint32)
+    drawn = np.zeros(n, dtype=np.uint8)
+    for e in range(total_edges):
+        drawn += ((masks >> e) & 1).astype(np.uint8)
+    by_level = np.argsort(drawn, kind="stable").astype(np.uint32)
+    level_start = np.searchsorted(drawn[by_level], np.arange(total_edges + 2))
+    del masks, drawn
+
+    values = np.zeros(n, dtype=np.int8)
+    moves = np.full(n, NO_MOVE, dtype=np.uint8)
+    for k in range(total_edges - 1, -1, -1):
+        level = by_level[level_start[k]:level_start[k + 1]]
+        best = np.full(len(level), -128, dtype=np.int16)
+        best_move = np.full(len(level), NO_MOVE, dtype=np.uint8)
+        for e in range(total_edges):
+            idx = np.nonzero((level & (1 << e)) == 0)[0]
+            child = level[idx] | np.uint32(1 << e)
+            gained = np.zeros(len(idx), dtype=np.int16)
+            for _, box_mask in edge_boxes[e]:
+                gained += (child & np.uint32(box_mask)) == box_mask
+            child_val = values[child].astype(np.int16)
+            # a capture keeps the turn, any other move hands it over
+            val = np.where(gained > 0, gained + child_val, -child_val)
+            better = val > best[idx]
+            best[idx[better]] = val[better]
+            best_move[idx[better]] = e
+        values[level] = best
+        moves[level] = best_move
+    return values, moves
+
+
+def generate(size, total_edges, edge_boxes, path=None):
+    """Solves every position of a size x size board and writes the database file."""
+    path = path or db_path(size)
+    values, moves = solve_all(total_edges, edge_boxes)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(HEADER.pack(MAGIC, size, total_edges))
+        f.write(values.tobytes())
+        f.write(moves.tobytes())
+    os.replace(tmp, path)
+    return path
+
+
+class SolvedDB:
+    """Read-only, memory-mapped view of a database written by generate()."""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.size, self.total_edges = HEADER.unpack_from(self._map, 0)
+        self._count = 1 << self.total_edges
+        if magic != MAGIC or len(self._map) != HEADER.size + 2 * self._count:
+            self._map.close()
+            raise ValueError(f"{path} is not a solved-position database")
+
+    def lookup(self, edges):
+        """Returns (net value for the player to move, best move or None)."""
+        val = self._map[HEADER.size + edges]
+        move = self._map[HEADER.size + self._count + edges]
+        return (val - 256 if val > 127 else val), (None if move == NO_MOVE else move)
+
+    def close(self):
+        self._map.close()
+
+
+def load_solved_db(size, total_edges):
+    """
+    Returns the SolvedDB for a board size, or None if its file has not been
+    generated (or does not match the board). Opened files are shared.
+    """
+    if size not in _OPEN_DBS:
+        db = None
+        path = db_path(size)
+        if os.path.exists(path):
+            try:
+                db = SolvedDB(path)
+            except (OSError, ValueError):
+                db = None
+        if db is not None and db.total_edges != total_edges:
+            db.close()
+            db = None
+        _OPEN_DBS[size] = db
+    return _OPEN_DBS[size]
+
+
+def main(argv=None):
+    import dab_engine
+
+    sizes = [int(a) for a in (argv if argv is not None else sys.argv[1:])] or [3, 4]
+    for size in sizes:
+        geom = dab_engine.geometry(size)
+        start = time.perf_counter()
+        path = generate(size, geom.total_edges, geom.edge_boxes)
+        print(f"{geom.name}: {1 << geom.total_edges} positions -> {path} "
+              f"({time.perf_counter() - start:.1f}s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""
+Regression tests for the search: the alpha-beta engine and the endgame
+solver against an exhaustive game-tree search of small boards, the
+transposition table on boards with more than 255 edges and root splits
+running side by side.
+
+    python -m pytest -q
+"""
+import random
+import threading
+from functools import lru_cache
+
+import pytest
+
+import dab_endgame
+from dab_engine import AI, EXACT, LOWER, BoardState, Searcher, TranspositionTable, geometry
+from dab_solvedb import load_solved_db
+
+
+def brute_force(geom):
+    """Exhaustive negamax over edge masks: net boxes still to be won by the mover."""
+    edge_boxes = geom.edge_boxes
+
+    @lru_cache(maxsize=None)
+    def value(edges):
+        if edges == geom.full_mask:
+            return 0
+        best = None
+        for e in range(geom.total_edges):
+            if edges >> e & 1:
+                continue
+            child = edges | 1 << e
+            gained = sum(1 for _, mask in edge_boxes[e] if child & mask == mask)
+            val = gained + value(child) if gained else -value(child)
+            if best is None or val > best:
+                best = val
+        return best
+
+    return value
+
+
+def random_positions(geom, count, seed):
+    rng = random.Random(seed)
+    positions = [0]
+    for _ in range(count):
+        drawn = rng.sample(range(geom.total_edges), rng.randrange(geom.total_edges))
+        positions.append(sum(1 << e for e in drawn))
+    return positions
+
+
+@pytest.mark.parametrize("rows, cols", [(3, 3), (3, 4), (2, 5)])
+def test_negamax_matches_brute_force(rows, cols):
+    geom = geometry(rows, cols)
+    exact = brute_force(geom)
+    # one searcher for every position, so later ones also read earlier entries
+    searcher = Searcher(geom)
+    for edges in random_positions(geom, 40, seed=rows * 10 + cols):
+        state = BoardState(geom, edges)
+        searcher.tt.new_search()
+        val, move = searcher._negamax(state, AI, geom.total_edges, -999, 999,
+                                      searcher.tt.hashes(edges))
+        assert val == exact(edges), f"{geom.name} edges {edges:#x}"
+        # the best move must reach that value too
+        child = edges | 1 << move
+        gained = sum(1 for _, mask in geom.edge_boxes[move] if child & mask == mask)
+        assert (gained + exact(child) if gained else -exact(child)) == val
+
+
+def test_endgame_solver_matches_brute_force():
+    geom = geometry(3, 4)
+    exact = brute_force(geom)
+    solved = 0
+    for edges in range(geom.full_mask + 1):
+        result = dab_endgame.solve(edges, geom.box_masks, geom.edge_boxes)
+        if result is not None:
+            solved += 1
+            assert result[0] == exact(edges), f"edges {edges:#x}"
+    assert solved
+
+
+@pytest.mark.parametrize("size", [3, 4])
+def test_endgame_solver_matches_solved_db(size):
+    geom = geometry(size)
+    db = load_solved_db(size, geom.total_edges)
+    if db is None:
+        pytest.skip(f"no solved database for {geom.name} (python dab_solvedb.py {size})")
+    rng = random.Random(size)
+    solved = 0
+    for _ in range(20000):
+        edges = rng.getrandbits(geom.total_edges)
+        result = dab_endgame.solve(edges, geom.box_masks, geom.edge_boxes)
+        if result is not None:
+            solved += 1
+            assert result[0] == db.lookup(edges)[0], f"edges {edges:#x}"
+    assert solved
+
+
+def test_table_round_trip_on_large_board():
+    geom = geometry(12)
+    assert geom.total_edges > 255
+    tt = TranspositionTable(geom, max_entries=4)
+    tt.new_search()
+    edges = (1 << 100) | (1 << 7)
+    key, sym, entry = tt.probe(tt.hashes(edges))
+    assert entry is None
+    move = geom.total_edges - 1
+    tt.store(key, sym, 200, LOWER, geom.total_edges, move)
+    assert tt.probe(tt.hashes(edges))[2] == (200, LOWER, geom.total_edges, move)
+    tt.store(key, sym, -250, EXACT, 3, None)
+    assert tt.probe(tt.hashes(edges))[2] == (-250, EXACT, 3, None)
+
+
+def test_table_rejects_oversized_boards():
+    with pytest.raises(ValueError):
+        TranspositionTable(geometry(24))
+
+
+def test_concurrent_split_searches():
+    # two threads splitting their roots at once: one gets the pool, the
+    # other searches alone, and both agree with a search without workers
+    geom = geometry(5)
+    searchers = [Searcher(geom, workers=1), Searcher(geom, workers=2)]
+    results = []
+
+    def run(searcher):
+        results.append(searcher.search_state(BoardState(geom), AI, max_depth=3))
+
+    threads = [threading.Thread(target=run, args=(s,)) for s in searchers]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    expected = Searcher(geom).search_state(BoardState(geom), AI, max_depth=3)[0]
+    assert [val for val, _ in results] == [expected, expected]
+    assert [s.workers for s in searchers] == [1, 2]